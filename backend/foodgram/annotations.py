@@ -0,0 +1,34 @@
+import logging
+
+from django.conf import settings
+
+from foodgram.metrics import MISSING_ANNOTATIONS
+
+
+class AnnotationMode:
+    WARN = 'warn'
+    RAISE = 'raise'
+
+
+class MissingAnnotationError(Exception):
+    """В queryset сериализатора не аннотировано ожидаемое поле."""
+
+
+def missing_annotation(serializer, field):
+    """Учет обращения сериализатора к неаннотированному полю.
+
+    В режиме raise (тесты производительности) вызывает исключение.
+    В режиме warn пишет предупреждение с путем запроса и увеличивает
+    счетчик Prometheus пары сериализатор-поле.
+    """
+    request = serializer.context.get('request')
+    path = request.path if request is not None else ''
+    name = serializer.__class__.__name__
+    message = (
+        f'{path}: Запрос к базе данных не оптимален. '
+        f'В {name} в переданном queryset не аннотировано поле {field}'
+    )
+    if settings.ANNOTATION_STRICT_MODE == AnnotationMode.RAISE:
+        raise MissingAnnotationError(message)
+    logging.warning(message)
+    MISSING_ANNOTATIONS.labels(name, field).inc()
@@ -0,0 +1,67 @@
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db import reset_health_checks
+
+
+def _run_in_thread(view, request, *args, **kwargs):
+    """Выполнение view в потоке из пула с собственным соединением с БД.
+
+    Соединения потоков пула не закрываются сигналами начала и конца
+    запроса, поэтому устаревшие соединения закрываются, а постоянные
+    отмечаются для проверки здесь.
+    Ответ отрисовывается в том же потоке.
+    """
+    close_old_connections()
+    reset_health_checks()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обертка синхронной view для работы под ASGI.
+
+    Django 3.2 не поддерживает асинхронные запросы к ORM, а синхронные
+    view под ASGI выполняются по очереди в одном потоке. Безопасные
+    (читающие) запросы выполняются параллельно в пуле потоков,
+    остальные - как обычные синхронные view.
+    """
+    read = sync_to_async(partial(_run_in_thread, view), thread_sensitive=False)
+    write = sync_to_async(view)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return async_view
+
+
+def async_read_urls(urlpatterns, names):
+    """Замена view маршрутов с указанными именами асинхронными.
+
+    Маршруты не изменяются, если ASYNC_READ_VIEWS выключен
+    (приложение работает под WSGI).
+    """
+    if not settings.ASYNC_READ_VIEWS:
+        return urlpatterns
+    return [
+        URLPattern(
+            pattern.pattern, async_read_view(pattern.callback),
+            pattern.default_args, pattern.name
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in urlpatterns
+    ]
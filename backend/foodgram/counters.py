@@ -0,0 +1,67 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CountersModelMixin:
+    """Исключение денормализованных счетчиков из обычного save().
+
+    Счетчики меняются только отдельными UPDATE (update_counter,
+    reconcile_counters), поэтому сохранение загруженного ранее объекта
+    (сериализатор, админка) не перезаписывает их устаревшими значениями.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not args
+                and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = self.get_deferred_fields().union(self.counter_fields)
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+def update_counter(model, pk, field, delta):
+    """Изменение денормализованного счетчика одним UPDATE."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def count_subquery(queryset, field):
+    """Количество объектов queryset, ссылающихся полем field на OuterRef."""
+    return Coalesce(
+        Subquery(
+            queryset
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def reconcile_counters(recipe_model, user_model, favorite_model,
+                       shopping_cart_model, subscribe_model):
+    """Пересчет всех денормализованных счетчиков.
+
+    Модели передаются параметрами, чтобы функцию можно было вызвать
+    и из миграции. Возвращает количество исправленных строк.
+    """
+    changed = 0
+    for model, field, related_model, related_field in (
+        (recipe_model, 'favorites_count', favorite_model, 'recipe'),
+        (recipe_model, 'carts_count', shopping_cart_model, 'recipe'),
+        (user_model, 'recipes_count', recipe_model, 'author'),
+        (user_model, 'subscribers_count', subscribe_model, 'author'),
+    ):
+        related = related_model.objects.all()
+        changed += model.objects.exclude(
+            **{field: count_subquery(related, related_field)}
+        ).update(**{field: count_subquery(related, related_field)})
+    return changed
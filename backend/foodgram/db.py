@@ -0,0 +1,122 @@
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE_KEY = 'db:primary:{}'
+
+_replica_state = contextvars.ContextVar('replica_state', default=None)
+
+
+def reset_health_checks():
+    """Отметка соединений с БД для проверки в начале запроса.
+
+    Аналог CONN_HEALTH_CHECKS из Django 4.1: соединение, оставшееся
+    от предыдущего запроса, проверяется запросом к БД перед первым
+    использованием (check_connection) и закрывается, если оно разорвано
+    (перезапуск БД или пулера, тайм-аут простоя). Соединения, которые
+    запрос не использует, не проверяются. Отмечаются соединения текущего
+    потока.
+    """
+    for connection in connections.all():
+        connection.health_check_done = not (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+        )
+
+
+def check_connection(alias):
+    """Проверка отмеченного соединения перед первым использованием."""
+    connection = connections[alias]
+    if getattr(connection, 'health_check_done', True):
+        return
+    connection.health_check_done = True
+    if not connection.in_atomic_block and not connection.is_usable():
+        connection.close()
+
+
+class ReplicaState:
+    """Источник чтения в пределах запроса.
+
+    Реплика выбирается один раз, чтобы все чтения запроса видели одно
+    состояние данных. После первой записи чтение переключается на
+    основную БД.
+    """
+
+    def __init__(self, use_replica):
+        self.replica = (
+            random.choice(settings.DATABASE_REPLICAS)
+            if use_replica and settings.DATABASE_REPLICAS else None
+        )
+        self.wrote = False
+
+
+@contextmanager
+def replica_reads(use_replica):
+    """Чтение с реплики (use_replica=True) или с основной БД в блоке.
+
+    Вне блока (команды, фоновые потоки) чтение выполняется с основной
+    БД. Данные, которые сохраняются в общий кэш или в память процесса,
+    читаются с основной БД, чтобы отставание реплики не закэшировалось.
+    """
+    state = ReplicaState(use_replica)
+    token = _replica_state.set(state)
+    try:
+        yield state
+    finally:
+        _replica_state.reset(token)
+
+
+class ReplicaRouter:
+    """Маршрутизация чтения на реплики, записи - на основную БД.
+
+    Перед первым в запросе использованием соединения выбранной БД
+    выполняется его проверка (reset_health_checks).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        if state is None or state.replica is None or state.wrote:
+            alias = DEFAULT_DB_ALIAS
+        else:
+            alias = state.replica
+        check_connection(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None:
+            state.wrote = True
+        check_connection(DEFAULT_DB_ALIAS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def get_client_key(request):
+    """Ключ клиента для привязки к основной БД: токен или сессия."""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def pin_to_primary(client_key):
+    cache.set(
+        PIN_CACHE_KEY.format(client_key), True, settings.REPLICA_PIN_TIMEOUT
+    )
+
+
+def is_pinned_to_primary(client_key):
+    return cache.get(PIN_CACHE_KEY.format(client_key), False)
@@ -0,0 +1,121 @@
+"""Настройки gunicorn.
+
+Запуск: gunicorn --config python:foodgram.gunicorn_conf
+Значения задаются переменными окружения или в .env.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+
+def env(name, default):
+    """Значение переменной окружения; пустое значение - значение
+    по умолчанию."""
+    return os.getenv(name) or default
+
+
+SERVER_INTERFACE = env('SERVER_INTERFACE', 'wsgi')
+# Настройки Django (ASYNC_READ_VIEWS) зависят от интерфейса; переменная
+# задается до любого обращения к настройкам (check_shared_cache
+# в мастере), чтобы ее унаследовали воркеры и без preload_app.
+os.environ['SERVER_INTERFACE'] = SERVER_INTERFACE
+
+wsgi_app = f'foodgram.{SERVER_INTERFACE}:application'
+bind = env('GUNICORN_BIND', '0:8000')
+
+# Под ASGI запросы к ORM выполняются в пуле потоков воркера uvicorn,
+# под WSGI каждый воркер обслуживает запросы в нескольких потоках.
+worker_class = env(
+    'GUNICORN_WORKER_CLASS',
+    'uvicorn.workers.UvicornWorker' if SERVER_INTERFACE == 'asgi'
+    else 'gthread'
+)
+workers = int(env('GUNICORN_WORKERS', CPU_COUNT * 2 + 1))
+threads = int(env('GUNICORN_THREADS', 4))
+
+preload_app = env('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Перезапуск воркеров после заданного числа запросов ограничивает рост
+# потребляемой памяти; разброс не дает перезапуститься всем сразу.
+max_requests = int(env('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(env('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Тайм-аут учитывает формирование pdf со списком покупок.
+timeout = int(env('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(env('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(env('GUNICORN_KEEPALIVE', 5))
+
+accesslog = env('GUNICORN_ACCESS_LOG', '-')
+
+WARM_UP = env('GUNICORN_WARM_UP', 'True') == 'True'
+
+# Метрики Prometheus воркеров записываются в файлы каталога и
+# суммируются при отдаче (foodgram.metrics). Переменная задается до
+# загрузки приложения, чтобы ее унаследовали все воркеры.
+PROMETHEUS_MULTIPROC_DIR = env(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'foodgram-metrics')
+)
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = PROMETHEUS_MULTIPROC_DIR
+# При preload_app приложение загружается до вызова on_starting.
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def check_shared_cache():
+    """Отказ запускать несколько воркеров с кэшем в памяти процесса.
+
+    Через кэш воркеры согласуют версии кэша рецептов и индекса
+    ингредиентов и удаление токенов при выходе.
+    """
+    if workers == 1:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from django.conf import settings
+
+    if settings.CACHES['default']['BACKEND'] == LOCAL_CACHE_BACKEND:
+        raise RuntimeError(
+            f'Для {workers} воркеров нужен общий бэкенд кэша '
+            '(CACHE_BACKEND, например memcached); LocMemCache допустим '
+            'только при GUNICORN_WORKERS=1.'
+        )
+
+
+def on_starting(server):
+    """Проверка кэша и удаление метрик предыдущего запуска (до создания
+    воркеров)."""
+    check_shared_cache()
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR)
+
+
+def when_ready(server):
+    if WARM_UP and preload_app:
+        from foodgram.warmup import warm_up_process
+
+        warm_up_process()
+
+
+def post_worker_init(worker):
+    if not WARM_UP:
+        return
+    from foodgram.warmup import warm_up_process, warm_up_worker
+
+    if not preload_app:
+        warm_up_process()
+    warm_up_worker(keep_connection=worker_class == 'sync')
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,88 @@
+"""Метрики Prometheus.
+
+Если задан PROMETHEUS_MULTIPROC_DIR (под gunicorn задается в
+foodgram.gunicorn_conf), каждый процесс пишет значения в свои файлы
+этого каталога, а при отдаче метрик значения всех процессов
+суммируются. Переменная окружения должна быть задана до импорта
+prometheus_client.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса',
+    ('view', 'method', 'status'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'foodgram_request_db_queries',
+    'Количество запросов к БД при обработке запроса',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_DURATION = Histogram(
+    'foodgram_request_db_duration_seconds',
+    'Время выполнения запросов к БД при обработке запроса',
+    ('view',),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кэшу (result: hit, miss)',
+    ('cache', 'result'),
+)
+PDF_GENERATION_DURATION = Histogram(
+    'foodgram_pdf_generation_seconds',
+    'Время создания pdf со списком покупок',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+MISSING_ANNOTATIONS = Counter(
+    'foodgram_missing_annotations_total',
+    'Обращения сериализаторов к неаннотированным полям',
+    ('serializer', 'field'),
+)
+
+UNRESOLVED_VIEW = 'unresolved'
+
+
+def get_view_name(view_func, method):
+    """Имя view для меток: класс и действие DRF (RecipeViewSet.list)."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    method = method.lower()
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+def observe_request(view, method, status, duration, queries, db_duration):
+    REQUEST_DURATION.labels(view, method, status).observe(duration)
+    REQUEST_DB_QUERIES.labels(view).observe(queries)
+    REQUEST_DB_DURATION.labels(view).observe(db_duration)
+
+
+def observe_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def get_registry():
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def export_metrics():
+    """Метрики в текстовом формате Prometheus и их content type."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
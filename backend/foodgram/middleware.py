@@ -0,0 +1,203 @@
+import logging
+from abc import ABC, abstractmethod
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db import (
+    get_client_key,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+    reset_health_checks,
+)
+from foodgram.metrics import UNRESOLVED_VIEW, get_view_name, observe_request
+from foodgram.performance import (
+    collect_metrics,
+    get_metrics,
+    install_query_recorder,
+)
+
+logger = logging.getLogger('foodgram.performance')
+
+
+class HybridMiddleware(ABC):
+    """Основа middleware для WSGI и ASGI.
+
+    Под ASGI middleware работает асинхронно (acall), и цепочка
+    middleware не переводит весь запрос в единственный поток синхронного
+    кода. Под WSGI вызывается call.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+    @abstractmethod
+    def call(self, request):
+        """Обработка запроса под WSGI."""
+
+    @abstractmethod
+    async def acall(self, request):
+        """Обработка запроса под ASGI."""
+
+
+class DatabaseHealthCheckMiddleware(HybridMiddleware):
+    """Отметка постоянных соединений с БД для проверки в начале запроса.
+
+    Соединение проверяется при первом использовании в запросе
+    (foodgram.db.check_connection). Под ASGI отмечаются соединения
+    потока, в котором выполняются синхронные view.
+    """
+
+    def call(self, request):
+        reset_health_checks()
+        return self.get_response(request)
+
+    async def acall(self, request):
+        await sync_to_async(reset_health_checks)()
+        return await self.get_response(request)
+
+
+class ReplicaMiddleware(HybridMiddleware):
+    """Чтение с реплик БД для безопасных запросов.
+
+    Запросы, изменяющие данные, и чтения после записи в том же запросе
+    выполняются на основной БД. После записи клиент (токен или сессия)
+    в течение REPLICA_PIN_TIMEOUT секунд читает с основной БД, чтобы
+    видеть свои изменения независимо от отставания реплик. Привязка
+    хранится в общем кэше.
+    """
+
+    def use_replica(self, request, client_key):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not (client_key and is_pinned_to_primary(client_key))
+        )
+
+    def call(self, request):
+        client_key = get_client_key(request)
+        with replica_reads(self.use_replica(request, client_key)) as state:
+            try:
+                return self.get_response(request)
+            finally:
+                if state.wrote and client_key:
+                    pin_to_primary(client_key)
+
+    async def acall(self, request):
+        client_key = get_client_key(request)
+        # Обращения к кэшу выполняются вне цикла событий.
+        use_replica = await sync_to_async(
+            self.use_replica, thread_sensitive=False
+        )(request, client_key)
+        with replica_reads(use_replica) as state:
+            try:
+                return await self.get_response(request)
+            finally:
+                if state.wrote and client_key:
+                    await sync_to_async(
+                        pin_to_primary, thread_sensitive=False
+                    )(client_key)
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """Показатели производительности запроса.
+
+    Количество запросов к БД, время SQL, сериализации и общее время
+    добавляются в заголовок Server-Timing и в поля записи лога.
+    При превышении PERFORMANCE_QUERY_THRESHOLD или
+    PERFORMANCE_DURATION_THRESHOLD в лог записываются выполненные
+    запросы к БД. Показатели также учитываются в метриках Prometheus
+    с меткой view (класс и действие DRF).
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        for connection in connections.all():
+            install_query_recorder(connection)
+
+    def call(self, request):
+        max_queries = settings.PERFORMANCE_MAX_CAPTURED_QUERIES
+        with collect_metrics(max_queries) as metrics:
+            response = self.get_response(request)
+            timings = metrics.get_timings()
+        return self.finish(request, response, metrics, timings)
+
+    async def acall(self, request):
+        max_queries = settings.PERFORMANCE_MAX_CAPTURED_QUERIES
+        with collect_metrics(max_queries) as metrics:
+            response = await self.get_response(request)
+            timings = metrics.get_timings()
+        return self.finish(request, response, metrics, timings)
+
+    def finish(self, request, response, metrics, timings):
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={timings["db"]:.1f};desc="{metrics.queries} queries"',
+                f'serialize;dur={timings["serialize"]:.1f}',
+                f'total;dur={timings["total"]:.1f}',
+            ))
+        self.log(request, response, metrics, timings)
+        observe_request(
+            metrics.view or UNRESOLVED_VIEW, request.method,
+            response.status_code, timings['total'] / 1000,
+            metrics.queries, timings['db'] / 1000
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.start_view(get_view_name(view_func, request.method))
+
+    def log(self, request, response, metrics, timings):
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(timings['db'], 1),
+            'serialize_ms': round(timings['serialize'], 1),
+            'total_ms': round(timings['total'], 1),
+        }
+        message = ' '.join(f'{name}={value}' for name, value in fields.items())
+        if (
+            metrics.queries <= settings.PERFORMANCE_QUERY_THRESHOLD
+            and timings['total'] <= settings.PERFORMANCE_DURATION_THRESHOLD
+        ):
+            logger.info(message, extra=fields)
+            return
+        fields['sql'] = [
+            {'sql': sql, 'ms': round(duration * 1000, 2)}
+            for sql, duration in metrics.captured
+        ]
+        fields['repeated_sql'] = [
+            {'sql': sql, 'count': count}
+            for sql, count in metrics.get_repeated_queries()
+        ]
+        details = '\n'.join(
+            f'{item["count"]} x {item["sql"]}'
+            for item in fields['repeated_sql']
+        ) or '\n'.join(
+            f'{item["ms"]} ms: {item["sql"]}' for item in fields['sql']
+        )
+        logger.warning(
+            f'Превышен порог производительности: {message}\n{details}',
+            extra=fields
+        )
@@ -1,6 +1,190 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class PageNumberLimitPagination(PageNumberPagination):
     """Паджинация с поддержкой указания количества получаемых объектов."""
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(BasePagination):
+    """Паджинация по ключу (курсору) для сортировки по убыванию.
+
+    Страница выбирается условием по значениям полей ``ordering``
+    последнего (или первого) объекта предыдущей страницы, поэтому
+    стоимость запроса не зависит от номера страницы, а новые объекты
+    не сдвигают уже полученные страницы. ``COUNT(*)`` не выполняется.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def encode_cursor(self, obj, reverse):
+        position = [
+            str(getattr(obj, field.lstrip('-'))) for field in self.ordering
+        ]
+        payload = json.dumps({'p': position, 'r': int(reverse)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['p'])
+            ]
+            reverse = bool(payload['r'])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_keyset_filter(self, position, reverse, fields=None):
+        """Условие «строго после позиции» для составного ключа.
+
+        fields - имена полей ключа, если они отличаются от ordering.
+        """
+        condition = Q()
+        equal = {}
+        names = fields or [field.lstrip('-') for field in self.ordering]
+        for field, name, value in zip(self.ordering, names, position):
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def get_ordering(self, reverse, fields=None):
+        names = fields or [field.lstrip('-') for field in self.ordering]
+        return tuple(
+            f'-{name}' if field.startswith('-') != reverse else name
+            for field, name in zip(self.ordering, names)
+        )
+
+    def set_page(self, results, page_size, position, reverse):
+        """Страница из page_size + 1 записей в порядке выборки."""
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page'
+        )
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        queryset = queryset.order_by(*self.get_ordering(reverse))
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, reverse)
+            )
+        self.page = self.set_page(
+            list(queryset[:page_size + 1]), page_size, position, reverse
+        )
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """Паджинация по ключу для объединения нескольких источников.
+
+    Источники - пары (queryset, поля ключа в порядке ordering; последнее
+    поле - id объекта). Из каждого источника по индексу читается
+    не больше страницы ключей, ключи объединяются без повторов, затем
+    объекты страницы загружаются одним запросом. Все поля ordering
+    должны сортироваться в одном направлении.
+    """
+
+    def paginate_sources(self, queryset, sources, request, view=None):
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page'
+        )
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        keys = set()
+        for source, fields in sources:
+            source = source.order_by(*self.get_ordering(reverse, fields))
+            if position is not None:
+                source = source.filter(
+                    self.get_keyset_filter(position, reverse, fields)
+                )
+            keys.update(source.values_list(*fields)[:page_size + 1])
+        descending = self.ordering[0].startswith('-') != reverse
+        keys = self.set_page(
+            sorted(keys, reverse=descending)[:page_size + 1],
+            page_size, position, reverse
+        )
+        objects = queryset.in_bulk([key[-1] for key in keys])
+        self.page = [objects[key[-1]] for key in keys if key[-1] in objects]
+        return self.page
+
+
+class PageNumberOrKeysetPagination(PageNumberLimitPagination):
+    """Постраничная паджинация с опциональным режимом курсора.
+
+    Режим курсора включается передачей параметра ``cursor``
+    (пустое значение запрашивает первую страницу). Формат ответа
+    сохраняется, но поле ``count`` в этом режиме не вычисляется.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        cursor_param = self.keyset_pagination_class.cursor_query_param
+        if cursor_param in request.query_params:
+            self.keyset = self.keyset_pagination_class(self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
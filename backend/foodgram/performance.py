@@ -0,0 +1,97 @@
+import contextvars
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_request_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Показатели обработки одного запроса.
+
+    Запросы к БД учитываются во всех потоках, в которые передается
+    контекст запроса (в том числе в пуле потоков асинхронных view).
+    """
+
+    def __init__(self, max_captured_queries):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.max_captured_queries = max_captured_queries
+        self.captured = []
+
+    def start_view(self, view=None):
+        self.view_started = time.perf_counter()
+        self.view = view
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if len(self.captured) < self.max_captured_queries:
+            self.captured.append((sql, duration))
+
+    def get_timings(self):
+        """Длительности этапов обработки запроса в миллисекундах.
+
+        serialize - время view без учета SQL: сериализация, отрисовка
+        ответа и прочий код view.
+        """
+        finished = time.perf_counter()
+        view_time = (
+            finished - self.view_started if self.view_started is not None
+            else 0.0
+        )
+        return {
+            'db': self.db_time * 1000,
+            'serialize': max(view_time - self.db_time, 0.0) * 1000,
+            'total': (finished - self.started) * 1000,
+        }
+
+    def get_repeated_queries(self, limit=5):
+        """Наиболее часто повторяющиеся запросы (признак N+1)."""
+        return [
+            (sql, count) for sql, count in Counter(
+                sql for sql, _ in self.captured
+            ).most_common(limit)
+            if count > 1
+        ]
+
+
+@contextmanager
+def collect_metrics(max_captured_queries):
+    metrics = RequestMetrics(max_captured_queries)
+    token = _request_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _request_metrics.reset(token)
+
+
+def get_metrics():
+    return _request_metrics.get()
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_query_recorder(connection)
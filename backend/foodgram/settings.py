@@ -1,5 +1,6 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -37,6 +38,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.PerformanceMiddleware',
+    'foodgram.middleware.DatabaseHealthCheckMiddleware',
+    'foodgram.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -75,10 +79,122 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'wdlCt555'),
         'HOST': os.getenv('DB_HOST', '127.0.0.1'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        # Постоянные соединения (секунд; 0 - соединение на каждый запрос)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        # Требуется при пулинге транзакций (PgBouncer, pool_mode=transaction)
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS'
+        ) == 'True',
     }
 }
 
+# Реплики только для чтения: хосты (host или host:port) через запятую;
+# имя базы на репликах по умолчанию совпадает с основной.
+DATABASE_REPLICAS = []
+for number, replica_host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['foodgram.db.ReplicaRouter']
+
+# Время, в течение которого после изменения данных клиент читает
+# с основной БД (секунд)
+REPLICA_PIN_TIMEOUT = int(os.getenv('REPLICA_PIN_TIMEOUT', 15))
+
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Привязка клиента к основной БД после записи хранится в кэше и должна
+# быть видна всем процессам.
+if DATABASE_REPLICAS and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'Для чтения с реплик (DB_REPLICA_HOSTS) нужен общий бэкенд кэша '
+        '(CACHE_BACKEND, например memcached).'
+    )
+
+RECIPES_CACHE_TIMEOUT = int(os.getenv('RECIPES_CACHE_TIMEOUT', 300))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 50))
+
+BULK_RECIPES_LIMIT = int(os.getenv('BULK_RECIPES_LIMIT', 100))
+
+# Лента подписок: рецепты авторов, у которых подписчиков не больше
+# FEED_FANOUT_LIMIT, записываются в ленты при публикации, рецепты
+# остальных авторов (флаг User.feed_pull) читаются при запросе ленты.
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 1000))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv('FEED_FANOUT_BATCH_SIZE', 1000))
+FEED_BACKFILL_LIMIT = int(os.getenv('FEED_BACKFILL_LIMIT', 100))
+
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+
+PERFORMANCE_LATENCY_FACTOR = float(
+    os.getenv('PERFORMANCE_LATENCY_FACTOR', 1)
+)
+
+# Асинхронные читающие эндпоинты включаются по умолчанию под ASGI.
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE') or 'wsgi'
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', str(SERVER_INTERFACE == 'asgi')
+) == 'True'
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 60))
+
+PERFORMANCE_SERVER_TIMING = os.getenv(
+    'PERFORMANCE_SERVER_TIMING', 'True'
+) == 'True'
+PERFORMANCE_QUERY_THRESHOLD = int(
+    os.getenv('PERFORMANCE_QUERY_THRESHOLD', 30)
+)
+PERFORMANCE_DURATION_THRESHOLD = float(
+    os.getenv('PERFORMANCE_DURATION_THRESHOLD', 500)
+)
+PERFORMANCE_MAX_CAPTURED_QUERIES = int(
+    os.getenv('PERFORMANCE_MAX_CAPTURED_QUERIES', 100)
+)
+
+# warn - предупреждение и счетчик, raise - исключение (для проверок).
+ANNOTATION_STRICT_MODE = os.getenv('ANNOTATION_STRICT_MODE', 'warn')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -124,7 +240,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'foodgram.pagination.PageNumberLimitPagination',
     'PAGE_SIZE': 6,
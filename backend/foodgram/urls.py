@@ -3,9 +3,12 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from foodgram.views import metrics
+
 urlpatterns = [
     path('', include('recipes.urls', namespace='recipes')),
     path('', include('users.urls', namespace='users')),
+    path('metrics', metrics, name='metrics'),
     path('admin/', admin.site.urls),
 ]
 
@@ -0,0 +1,9 @@
+from django.http import HttpResponse
+
+from foodgram.metrics import export_metrics
+
+
+def metrics(request):
+    """Метрики в формате Prometheus (для сбора внутри сети)."""
+    content, content_type = export_metrics()
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,33 @@
+from django.db import connection, connections
+from django.urls import get_resolver
+
+
+def warm_up_process():
+    """Подготовка, общая для всех воркеров.
+
+    Выполняется в мастер-процессе до создания воркеров (preload_app),
+    поэтому импортированные модули, шрифт pdf и маршруты разделяются
+    воркерами. Соединения с БД мастер-процесса закрываются, чтобы
+    воркеры не унаследовали их.
+    """
+    from recipes.utils import register_font
+
+    register_font()
+    get_resolver().url_patterns
+    connections.close_all()
+
+
+def warm_up_worker(keep_connection=True):
+    """Подготовка воркера до приема запросов.
+
+    Открывает соединение с БД (при недоступности БД воркер не запустится)
+    и строит индекс ингредиентов процесса. Если запросы обслуживаются
+    не в основном потоке воркера, соединение этого потока не будет
+    использовано и закрывается (keep_connection=False).
+    """
+    from recipes.search import ingredient_index
+
+    connection.ensure_connection()
+    ingredient_index.search()
+    if not keep_connection:
+        connection.close()
@@ -8,6 +8,7 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.signals import recipe_ingredients_changed
 
 
 @admin.register(Tag)
@@ -39,9 +40,35 @@ class RecipesAdmin(admin.ModelAdmin):
     filter_horizontal = ('tags',)
     inlines = (RecipeIngredientInLine,)
 
-    @admin.display(description='Добавлений в избранное')
+    @staticmethod
+    def get_amounts(recipe):
+        return dict(
+            RecipeIngredient.objects.filter(recipe=recipe)
+            .values_list('ingredient_id', 'amount')
+        )
+
+    def save_related(self, request, form, formsets, change):
+        """Учет ингредиентов, измененных в инлайне, в списках покупок
+        (как в RecipeSerializer.update)."""
+        recipe = form.instance
+        old_amounts = self.get_amounts(recipe) if change else {}
+        super().save_related(request, form, formsets, change)
+        new_amounts = self.get_amounts(recipe)
+        changes = {
+            ingredient_id: (
+                old_amounts.get(ingredient_id), new_amounts.get(ingredient_id)
+            )
+            for ingredient_id in {*old_amounts, *new_amounts}
+            if old_amounts.get(ingredient_id) != new_amounts.get(ingredient_id)
+        }
+        recipe_ingredients_changed.send(
+            sender=Recipe, recipe_id=recipe.pk, changes=changes
+        )
+
+    @admin.display(ordering='favorites_count',
+                   description='Добавлений в избранное')
     def followers_count(self, obj):
-        return obj.followers.count()
+        return obj.favorites_count
 
     @admin.display(ordering='author__email',
                    description='адрес электронной почты автора')
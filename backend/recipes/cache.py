@@ -0,0 +1,95 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CacheKeys:
+    LIST_VERSION = 'recipes:list:version'
+    CATALOG_VERSION = 'recipes:catalog:version'
+    RECIPE_VERSION = 'recipes:recipe:version:{}'
+    LIST = 'recipes:list:{}:{}'
+    DETAIL = 'recipes:detail:{}:{}:{}:{}'
+    INGREDIENT_INDEX_VERSION = 'recipes:ingredient-index:version'
+
+
+LIST_QUERY_PARAMS = ('page', 'limit', 'author', 'cursor', 'search',
+                     'tags_match')
+LIST_MULTIPLE_QUERY_PARAMS = ('tags',)
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _get_versions(*keys):
+    """Текущие версии кэша; отсутствующие версии создаются."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_versions(*keys):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def get_list_key(request):
+    """Ключ кэша списка рецептов по нормализованным параметрам запроса."""
+    params = request.query_params
+    normalized = [
+        f'{name}={params.get(name, "")}' for name in LIST_QUERY_PARAMS
+    ]
+    normalized += [
+        f'{name}={",".join(sorted(set(params.getlist(name))))}'
+        for name in LIST_MULTIPLE_QUERY_PARAMS
+    ]
+    list_version, = _get_versions(CacheKeys.LIST_VERSION)
+    return CacheKeys.LIST.format(
+        list_version, _digest(request.scheme, request.get_host(), *normalized)
+    )
+
+
+def get_detail_key(request, pk):
+    """Ключ кэша отдельного рецепта."""
+    catalog_version, recipe_version = _get_versions(
+        CacheKeys.CATALOG_VERSION, CacheKeys.RECIPE_VERSION.format(pk)
+    )
+    return CacheKeys.DETAIL.format(
+        pk, catalog_version, recipe_version,
+        _digest(request.scheme, request.get_host())
+    )
+
+
+def get_cached_data(key):
+    return cache.get(key)
+
+
+def set_cached_data(key, data):
+    cache.set(key, data, settings.RECIPES_CACHE_TIMEOUT)
+
+
+def invalidate_recipes(recipe_ids):
+    """Сброс кэша списков и указанных рецептов."""
+    _bump_versions(
+        CacheKeys.LIST_VERSION,
+        *(CacheKeys.RECIPE_VERSION.format(pk) for pk in recipe_ids)
+    )
+
+
+def invalidate_catalog():
+    """Сброс кэша всех списков и рецептов (изменение тегов/ингредиентов)."""
+    _bump_versions(CacheKeys.LIST_VERSION, CacheKeys.CATALOG_VERSION)
+
+
+def get_ingredient_index_version():
+    version, = _get_versions(CacheKeys.INGREDIENT_INDEX_VERSION)
+    return version
+
+
+def invalidate_ingredient_index():
+    """Перестроение индексов ингредиентов во всех процессах."""
+    _bump_versions(CacheKeys.INGREDIENT_INDEX_VERSION)
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+
+def rebuild_feeds(feed_entry_model, recipe_model, subscribe_model,
+                  fanout_limit, backfill_limit, batch_size=1000,
+                  user_model=None):
+    """Заполнение лент подписок заново.
+
+    В ленты подписчиков добавляются последние backfill_limit рецептов
+    авторов, у которых подписчиков не больше fanout_limit. Если передана
+    user_model, флаг feed_pull устанавливается остальным авторам
+    и снимается у этих. Модели передаются параметрами, чтобы функцию
+    можно было вызвать и из миграции. Возвращает количество созданных
+    записей.
+    """
+    feed_entry_model.objects.all().delete()
+    subscribers = defaultdict(list)
+    for user_id, author_id in subscribe_model.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        subscribers[author_id].append(user_id)
+    pull_authors = [
+        author_id for author_id, user_ids in subscribers.items()
+        if len(user_ids) > fanout_limit
+    ]
+    if user_model is not None:
+        user_model.objects.filter(feed_pull=True).exclude(
+            pk__in=pull_authors
+        ).update(feed_pull=False)
+        user_model.objects.filter(
+            pk__in=pull_authors, feed_pull=False
+        ).update(feed_pull=True)
+    created = 0
+    for author_id, user_ids in subscribers.items():
+        if len(user_ids) > fanout_limit:
+            continue
+        recipes = list(
+            recipe_model.objects
+            .filter(author_id=author_id)
+            .order_by('-pub_date', '-id')
+            .values_list('pk', 'pub_date')[:backfill_limit]
+        )
+        entries = [
+            feed_entry_model(
+                user_id=user_id, recipe_id=recipe_id, pub_date=pub_date
+            )
+            for user_id in user_ids for recipe_id, pub_date in recipes
+        ]
+        feed_entry_model.objects.bulk_create(entries, batch_size=batch_size)
+        created += len(entries)
+    return created
@@ -0,0 +1,80 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from drf_extra_fields.fields import Base64ImageField
+from drf_extra_fields.relations import PresentablePrimaryKeyRelatedField
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class RenditionImageField(Base64ImageField):
+    """Изображение рецепта, отображаемое подходящей уменьшенной копией.
+
+    rendition - имя копии (thumbnail, card, full) или словарь
+    {действие вьюсета: имя копии} с ключом None для остальных действий.
+    Пока копия не создана, отображается исходное изображение.
+    """
+
+    def __init__(self, rendition='full', **kwargs):
+        self.rendition = rendition
+        super().__init__(**kwargs)
+
+    def get_rendition(self):
+        if not isinstance(self.rendition, dict):
+            return self.rendition
+        view = self.context.get('view')
+        action = getattr(view, 'action', None)
+        return self.rendition.get(action, self.rendition.get(None))
+
+    def to_representation(self, file):
+        rendition = getattr(
+            getattr(file, 'instance', None), f'image_{self.get_rendition()}',
+            None
+        )
+        return super().to_representation(rendition or file)
+
+
+class BulkManyRelatedField(PresentablePrimaryKeyRelatedField.ManyRelatedField):
+    """Список первичных ключей, проверяемых одним запросом.
+
+    Возвращает найденные объекты в порядке переданных ключей,
+    для несуществующих ключей возвращает ошибку по каждому из них.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        objects = queryset.in_bulk(set(pks))
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            raise ValidationError([
+                child.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in missing
+            ], code='does_not_exist')
+        return [objects[pk] for pk in pks]
+
+
+class BulkPresentablePrimaryKeyRelatedField(
+    PresentablePrimaryKeyRelatedField
+):
+    """PresentablePrimaryKeyRelatedField, который при many=True
+    получает все объекты одним запросом."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
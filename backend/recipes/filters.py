@@ -1,12 +1,20 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
 
+RecipeTag = Recipe.tags.through
 
-class IngredientSearchFilter(SearchFilter):
-    """Поиск ингредиентов."""
-    search_param = 'name'
+
+class TagsMatch:
+    ANY = 'any'
+    ALL = 'all'
+    CHOICES = (
+        (ANY, 'Любой из тегов'),
+        (ALL, 'Все теги'),
+    )
 
 
 class RecipeFilter(FilterSet):
@@ -18,8 +26,13 @@ class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         queryset=Tag.objects.all(),
         to_field_name='slug',
-        field_name='tags__slug'
+        method='filter_tags'
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=TagsMatch.CHOICES,
+        method='filter_tags_match'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
@@ -36,3 +49,43 @@ class RecipeFilter(FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(carts__user=self.request.user)
         return queryset
+
+    def filter_tags(self, queryset, name, value):
+        """Фильтрация по тегам без соединения с таблицей тегов.
+
+        Условие проверяется подзапросом, поэтому строки рецептов
+        не размножаются и DISTINCT не требуется. По умолчанию
+        достаточно любого из тегов, при ``tags_match=all`` рецепт
+        должен содержать все переданные теги.
+        """
+        tag_ids = {tag.pk for tag in value}
+        if not tag_ids:
+            return queryset
+        if self.form.cleaned_data.get('tags_match') == TagsMatch.ALL:
+            return queryset.filter(pk__in=RecipeTag.objects.filter(
+                tag_id__in=tag_ids
+            ).values('recipe_id').annotate(
+                tags_count=Count('tag_id')
+            ).filter(tags_count=len(tag_ids)).values('recipe_id'))
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+        )))
+
+    def filter_tags_match(self, queryset, name, value):
+        """Режим сопоставления тегов применяется в ``filter_tags``."""
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию рецепта.
+
+        Результаты упорядочены по релевантности. Для баз данных,
+        отличных от PostgreSQL, выполняется поиск по подстроке.
+        """
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            )
+        query = SearchQuery(value, config='russian', search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date', '-id')
@@ -0,0 +1,116 @@
+import functools
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from recipes import cache
+from recipes.models import Recipe
+
+
+class RenditionSettings:
+    SIZES = {
+        'thumbnail': (240, 240),
+        'card': (640, 640),
+        'full': (1600, 1600),
+    }
+    FORMAT = 'JPEG'
+    EXTENSION = 'jpg'
+    QUALITY = 85
+    BACKGROUND = (255, 255, 255)
+
+
+RENDITION_FIELDS = tuple(f'image_{name}' for name in RenditionSettings.SIZES)
+
+
+def render_image(image, size):
+    """Уменьшенная копия изображения в формате JPEG."""
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    if rendition.mode != 'RGB':
+        rgba = rendition.convert('RGBA')
+        rendition = Image.new('RGB', rgba.size, RenditionSettings.BACKGROUND)
+        rendition.paste(rgba, mask=rgba.getchannel('A'))
+    buffer = io.BytesIO()
+    rendition.save(
+        buffer, RenditionSettings.FORMAT,
+        quality=RenditionSettings.QUALITY, optimize=True, progressive=True
+    )
+    return buffer.getvalue()
+
+
+def build_renditions(recipe_id, stale_names=()):
+    """Создание уменьшенных копий изображения рецепта.
+
+    После сохранения новых копий удаляются файлы прежних копий: текущих
+    и переданных в stale_names (сброшенных при загрузке изображения).
+    """
+    try:
+        recipe = Recipe.objects.only('id', 'image', *RENDITION_FIELDS).get(
+            pk=recipe_id
+        )
+    except Recipe.DoesNotExist:
+        return False
+    stale_names = {
+        getattr(recipe, field).name for field in RENDITION_FIELDS
+    }.union(stale_names)
+    with recipe.image.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    stem = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    for name, size in RenditionSettings.SIZES.items():
+        getattr(recipe, f'image_{name}').save(
+            f'{stem}_{name}.{RenditionSettings.EXTENSION}',
+            ContentFile(render_image(image, size)),
+            save=False
+        )
+    names = {field: getattr(recipe, field).name for field in RENDITION_FIELDS}
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name
+    ).update(**names)
+    if updated:
+        cache.invalidate_recipes((recipe_id,))
+        obsolete = stale_names.difference(names.values())
+    else:
+        # Изображение заменили во время обработки: новые копии не нужны.
+        obsolete = set(names.values())
+    for name in obsolete:
+        if name:
+            recipe.image.storage.delete(name)
+    return bool(updated)
+
+
+def _build_renditions_in_background(recipe_id, stale_names):
+    try:
+        build_renditions(recipe_id, stale_names)
+    except Exception:
+        logging.exception(
+            f'Не удалось создать копии изображения рецепта {recipe_id}'
+        )
+    finally:
+        close_old_connections()
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_RENDITION_WORKERS,
+        thread_name_prefix='image-renditions'
+    )
+
+
+def schedule_renditions(recipe_id, stale_names=()):
+    """Создание копий изображения в фоне после фиксации транзакции.
+
+    Очередь хранится в памяти процесса и теряется при его перезапуске
+    (например, max_requests в gunicorn); недостающие копии создает
+    периодический запуск команды build_image_renditions.
+    """
+    transaction.on_commit(lambda: get_executor().submit(
+        _build_renditions_in_background, recipe_id, stale_names
+    ))
@@ -0,0 +1,146 @@
+import http.client
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=6&tags=breakfast',
+    '/api/tags/',
+    '/api/ingredients/?name=сол',
+    '/api/users/',
+)
+
+
+def parse_target(value):
+    name, sep, url = value.partition('=')
+    parsed = urlsplit(url)
+    if not sep or parsed.scheme not in ('http', 'https'):
+        raise CommandError(
+            f'Некорректная цель "{value}", ожидается имя=http://хост:порт'
+        )
+    return name, parsed
+
+
+def connect(url, timeout):
+    connection_class = (
+        http.client.HTTPSConnection if url.scheme == 'https'
+        else http.client.HTTPConnection
+    )
+    return connection_class(url.hostname, url.port, timeout=timeout)
+
+
+def run_connection(url, paths, counter, total, timeout):
+    """Последовательные запросы через одно keep-alive соединение."""
+    paths = [quote(path, safe='/?=&') for path in paths]
+    connection = connect(url, timeout)
+    timings = []
+    errors = 0
+    try:
+        for number in counter:
+            if number >= total:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', paths[number % len(paths)])
+                response = connection.getresponse()
+                response.read()
+                errors += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                connection = connect(url, timeout)
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+    return timings, errors
+
+
+class Command(BaseCommand):
+    help = ('Сравнение пропускной способности развертываний API '
+            '(например, WSGI и ASGI) при одновременных соединениях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-t',
+            '--target',
+            nargs='+',
+            required=True,
+            help='Развертывания в виде имя=http://хост:порт, например '
+                 'wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001'
+        )
+        parser.add_argument(
+            '-p',
+            '--paths',
+            nargs='+',
+            default=DEFAULT_PATHS,
+            help='Запрашиваемые по кругу адреса'
+        )
+        parser.add_argument(
+            '-c',
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=(1, 10, 50),
+            help='Количество одновременных соединений'
+        )
+        parser.add_argument(
+            '-n',
+            '--requests',
+            type=int,
+            default=500,
+            help='Количество запросов для каждого уровня параллельности'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30,
+            help='Тайм-аут запроса, с'
+        )
+
+    def handle(self, *args, **options):
+        targets = [parse_target(value) for value in options['target']]
+        self.stdout.write(
+            f'{"цель":>8} {"соединений":>10} {"запросов/с":>11} '
+            f'{"медиана, мс":>12} {"p95, мс":>10} {"ошибок":>7}'
+        )
+        for concurrency in options['concurrency']:
+            for name, url in targets:
+                self.report(name, concurrency, *self.run(
+                    url, options['paths'], concurrency, options['requests'],
+                    options['timeout']
+                ))
+
+    def run(self, url, paths, concurrency, total, timeout):
+        counter = itertools.count()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(
+                lambda _: run_connection(url, paths, counter, total, timeout),
+                range(concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+        timings = sorted(itertools.chain.from_iterable(
+            timings for timings, _ in results
+        ))
+        errors = sum(errors for _, errors in results)
+        return timings, errors, elapsed
+
+    def report(self, name, concurrency, timings, errors, elapsed):
+        if not timings:
+            self.stdout.write(self.style.ERROR(
+                f'{name:>8} {concurrency:>10}: нет успешных запросов'
+            ))
+            return
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{name:>8} {concurrency:>10} '
+            f'{len(timings) / elapsed:>11.1f} '
+            f'{statistics.median(timings):>12.1f} {p95:>10.1f} '
+            f'{errors:>7}'
+        )
@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection
+
+from foodgram.db import check_connection, reset_health_checks
+
+MODES = (
+    ('соединение на запрос', 0, False),
+    ('постоянное', None, False),
+    ('постоянное + проверка', None, True),
+)
+
+
+class Command(BaseCommand):
+    help = ('Замер накладных расходов на соединение с БД в расчете на '
+            'запрос: новое соединение на каждый запрос и постоянные '
+            'соединения (в том числе через пулер, см. DB_HOST/DB_PORT)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--requests',
+            type=int,
+            default=500,
+            help='Количество имитируемых запросов для каждого режима'
+        )
+        parser.add_argument(
+            '-q',
+            '--queries',
+            type=int,
+            default=1,
+            help='Количество запросов к БД в одном запросе к API'
+        )
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        initial = (
+            settings_dict['CONN_MAX_AGE'],
+            settings_dict.get('CONN_HEALTH_CHECKS', False),
+        )
+        self.stdout.write(
+            f'{settings_dict["HOST"]}:{settings_dict["PORT"]}, '
+            f'база {settings_dict["NAME"]}'
+        )
+        self.stdout.write(
+            f'{"режим":>22} {"медиана, мс":>12} {"p95, мс":>10} '
+            f'{"соединений":>11}'
+        )
+        try:
+            for name, conn_max_age, health_checks in MODES:
+                settings_dict['CONN_MAX_AGE'] = (
+                    (initial[0] or 600) if conn_max_age is None
+                    else conn_max_age
+                )
+                settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                self.report(name, *self.run(
+                    options['requests'], options['queries']
+                ))
+        finally:
+            (settings_dict['CONN_MAX_AGE'],
+             settings_dict['CONN_HEALTH_CHECKS']) = initial
+            connection.close()
+
+    def run(self, requests, queries):
+        """Цикл запросов как в обработчике Django: закрытие устаревших
+        соединений в начале и в конце запроса."""
+        connection.close()
+        timings = []
+        connects = 0
+        for _ in range(requests):
+            started = time.perf_counter()
+            close_old_connections()
+            reset_health_checks()
+            check_connection(DEFAULT_DB_ALIAS)
+            connects += connection.connection is None
+            for _ in range(queries):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings, connects
+
+    def report(self, name, timings, connects):
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{name:>22} {statistics.median(timings):>12.3f} '
+            f'{p95:>10.3f} {connects:>11}'
+        )
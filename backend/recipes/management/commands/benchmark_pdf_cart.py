@@ -0,0 +1,80 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from recipes.utils import pdf_cart, register_font
+
+
+def make_ingredients(size):
+    """Синтетический агрегированный список покупок заданного размера."""
+    return [
+        {
+            'ingredient__name': f'Ингредиент номер {number}',
+            'ingredient__measurement_unit': 'г',
+            'amount': number % 1000 + 1,
+        }
+        for number in range(size)
+    ]
+
+
+def render(ingredients):
+    """Формирование ответа и чтение его содержимого, как при отдаче."""
+    response = pdf_cart(ingredients)
+    try:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    finally:
+        response.close()
+
+
+class Command(BaseCommand):
+    help = ('Замер времени формирования и пикового потребления памяти '
+            'pdf со списком покупок')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-s',
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=(10, 100, 1000),
+            help='Количество ингредиентов в списке покупок'
+        )
+        parser.add_argument(
+            '-r',
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество повторов для каждого размера'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        register_font()
+        self.stdout.write(
+            'Регистрация шрифта (однократно за процесс): '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+        self.stdout.write(
+            f'{"ингредиентов":>12} {"медиана, мс":>12} {"p95, мс":>10} '
+            f'{"пик памяти, КБ":>15} {"размер, КБ":>11}'
+        )
+        for size in options['sizes']:
+            ingredients = make_ingredients(size)
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                document_size = render(ingredients)
+                timings.append((time.perf_counter() - started) * 1000)
+            tracemalloc.start()
+            render(ingredients)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{size:>12} {statistics.median(timings):>12.1f} '
+                f'{p95:>10.1f} {peak / 1024:>15.0f} '
+                f'{document_size / 1024:>11.0f}'
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Создание недостающих уменьшенных копий изображений рецептов '
+            '(для периодического запуска)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-a',
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_thumbnail='')
+        built = failed = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator():
+            try:
+                built += build_renditions(recipe_id)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(
+                    f'Рецепт {recipe_id}: ошибка обработки "{e}"'
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {built}, с ошибками: {failed}.'
+        ))
@@ -0,0 +1,310 @@
+import datetime
+import io
+import itertools
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from foodgram.counters import reconcile_counters
+from recipes.cache import invalidate_catalog, invalidate_ingredient_index
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class GeneratorSettings:
+    PLACEHOLDER_IMAGE = 'recipes/placeholder.jpg'
+    DEFAULT_TAGS = (
+        ('Завтрак', '#E26C2D', 'breakfast'),
+        ('Обед', '#49B64E', 'lunch'),
+        ('Ужин', '#8775D2', 'dinner'),
+    )
+    DEFAULT_INGREDIENTS = 500
+    WORDS = (
+        'нарезать', 'смешать', 'добавить', 'обжарить', 'посолить',
+        'запекать', 'довести', 'до', 'кипения', 'остудить', 'подавать',
+        'с', 'зеленью', 'на', 'среднем', 'огне', 'минут', 'тесто',
+    )
+    START_DATE = datetime.datetime(2023, 6, 1, tzinfo=datetime.timezone.utc)
+    PUBLICATION_INTERVAL = datetime.timedelta(minutes=7)
+
+
+class BatchWriter:
+    """Накопление объектов и запись в базу данных пакетами."""
+
+    def __init__(self, model, batch_size, label=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.label = label or model._meta.verbose_name_plural
+        self.batch = []
+        self.count = 0
+
+    def add(self, obj):
+        self.batch.append(obj)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.model.objects.bulk_create(self.batch)
+        self.count += len(self.batch)
+        self.batch = []
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+
+def zipf_cum_weights(size, skew):
+    """Накопленные веса рангового распределения Ципфа."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, size + 1)
+    ))
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет задать дату публикации рецептов при bulk_create."""
+    field = Recipe._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Генерация синтетических пользователей, рецептов, избранного, '
+            'списков покупок и подписок для нагрузочного тестирования')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Количество пользователей')
+        parser.add_argument('--recipes', type=int, default=10000,
+                            help='Количество рецептов')
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8,
+                            help='Количество ингредиентов в рецепте')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Среднее количество избранных рецептов '
+                                 'у пользователя')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Среднее количество рецептов в списке '
+                                 'покупок пользователя')
+        parser.add_argument('--subscriptions', type=int, default=10,
+                            help='Среднее количество подписок пользователя')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа для '
+                                 'популярности авторов')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора случайных '
+                                 'чисел')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Размер пакета при записи в базу данных')
+        parser.add_argument('--password', default='password',
+                            help='Пароль создаваемых пользователей')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            tag_ids = self.get_tags()
+            ingredient_ids = self.get_ingredients()
+            user_ids = self.create_users(
+                options['users'], options['password']
+            )
+            author_weights = zipf_cum_weights(len(user_ids), options['skew'])
+            recipe_ids, recipe_weights = self.create_recipes(
+                options['recipes'], user_ids, author_weights, tag_ids,
+                ingredient_ids, options['ingredients_per_recipe']
+            )
+            for model, average in (
+                (Favorite, options['favorites']),
+                (ShoppingCart, options['carts']),
+            ):
+                self.create_user_recipes(
+                    model, average, user_ids, recipe_ids, recipe_weights
+                )
+            self.create_subscriptions(
+                options['subscriptions'], user_ids, author_weights
+            )
+            self.reset_sequences()
+            reconcile_counters(
+                Recipe, User, Favorite, ShoppingCart, Subscribe
+            )
+            call_command('rebuild_shopping_lists', stdout=io.StringIO(),
+                         batch_size=self.batch_size)
+            call_command('rebuild_feeds', stdout=io.StringIO(),
+                         batch_size=self.batch_size)
+        invalidate_catalog()
+        invalidate_ingredient_index()
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы.'))
+
+    def report(self, writer):
+        self.stdout.write(
+            f'{writer.label}: {writer.count}'
+        )
+
+    def get_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in GeneratorSettings.DEFAULT_TAGS
+            )
+        return list(Tag.objects.order_by('id').values_list('id', flat=True))
+
+    def get_ingredients(self):
+        if not Ingredient.objects.exists():
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+                for number in range(GeneratorSettings.DEFAULT_INGREDIENTS)
+            )
+        return list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+
+    def get_placeholder_image(self):
+        name = GeneratorSettings.PLACEHOLDER_IMAGE
+        if default_storage.exists(name):
+            return name
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (230, 230, 230)).save(buffer, 'JPEG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count, password):
+        first_id = next_id(User)
+        password = make_password(password)
+        writer = BatchWriter(User, self.batch_size)
+        for user_id in range(first_id, first_id + count):
+            writer.add(User(
+                id=user_id,
+                username=f'user{user_id}',
+                email=f'user{user_id}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password,
+            ))
+        writer.flush()
+        self.report(writer)
+        user_ids = list(range(first_id, first_id + count))
+        self.rng.shuffle(user_ids)
+        return user_ids
+
+    def create_recipes(self, count, user_ids, author_weights, tag_ids,
+                       ingredient_ids, ingredients_per_recipe):
+        """Рецепты с тегами и ингредиентами.
+
+        Авторы выбираются по распределению Ципфа: небольшое число
+        авторов публикует большую часть рецептов. Возвращает id рецептов
+        и накопленные веса их популярности (по популярности автора).
+        """
+        first_id = next_id(Recipe)
+        image = self.get_placeholder_image()
+        author_rank = {author: rank for rank, author in enumerate(user_ids)}
+        authors = self.rng.choices(
+            user_ids, cum_weights=author_weights, k=count
+        )
+        recipes = BatchWriter(Recipe, self.batch_size)
+        tags = BatchWriter(
+            Recipe.tags.through, self.batch_size, label='Теги рецептов'
+        )
+        ingredients = BatchWriter(RecipeIngredient, self.batch_size)
+        ingredients_per_recipe = min(
+            ingredients_per_recipe, len(ingredient_ids)
+        )
+        recipe_weights = []
+        total_weight = 0
+        with explicit_pub_date():
+            for number, author_id in enumerate(authors):
+                recipe_id = first_id + number
+                recipes.add(Recipe(
+                    id=recipe_id,
+                    author_id=author_id,
+                    name=f'Рецепт {recipe_id}',
+                    text=' '.join(self.rng.choices(
+                        GeneratorSettings.WORDS, k=30
+                    )),
+                    cooking_time=self.rng.randint(5, 180),
+                    image=image,
+                    pub_date=(
+                        GeneratorSettings.START_DATE
+                        + GeneratorSettings.PUBLICATION_INTERVAL * number
+                    ),
+                ))
+                for tag_id in self.rng.sample(
+                    tag_ids, self.rng.randint(1, min(3, len(tag_ids)))
+                ):
+                    tags.add(Recipe.tags.through(
+                        recipe_id=recipe_id, tag_id=tag_id
+                    ))
+                for ingredient_id in self.rng.sample(
+                    ingredient_ids, ingredients_per_recipe
+                ):
+                    ingredients.add(RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.randint(1, 500)
+                    ))
+                total_weight += 1 / (author_rank[author_id] + 1)
+                recipe_weights.append(total_weight)
+            recipes.flush()
+        tags.flush()
+        ingredients.flush()
+        for writer in (recipes, tags, ingredients):
+            self.report(writer)
+        return list(range(first_id, first_id + count)), recipe_weights
+
+    def create_user_recipes(self, model, average, user_ids, recipe_ids,
+                            recipe_weights):
+        """Избранное или списки покупок со смещением к популярным авторам."""
+        writer = BatchWriter(model, self.batch_size)
+        existing = set(model.objects.values_list('user_id', 'recipe_id'))
+        for user_id in sorted(user_ids):
+            count = min(self.rng.randint(0, 2 * average), len(recipe_ids))
+            chosen = set(self.rng.choices(
+                recipe_ids, cum_weights=recipe_weights, k=count
+            ))
+            for recipe_id in sorted(chosen):
+                if (user_id, recipe_id) not in existing:
+                    writer.add(model(user_id=user_id, recipe_id=recipe_id))
+        writer.flush()
+        self.report(writer)
+
+    def create_subscriptions(self, average, user_ids, author_weights):
+        writer = BatchWriter(Subscribe, self.batch_size)
+        for user_id in sorted(user_ids):
+            count = min(self.rng.randint(0, 2 * average), len(user_ids) - 1)
+            chosen = set(self.rng.choices(
+                user_ids, cum_weights=author_weights, k=count
+            ))
+            chosen.discard(user_id)
+            for author_id in sorted(chosen):
+                writer.add(Subscribe(user_id=user_id, author_id=author_id))
+        writer.flush()
+        self.report(writer)
+
+    def reset_sequences(self):
+        """Синхронизация последовательностей первичных ключей после вставки
+        объектов с явно заданными id."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), (User, Recipe)
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -1,18 +1,37 @@
 import csv
+import io
+import itertools
 import os
 
-import django.db.utils
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 
+from recipes.cache import invalidate_ingredient_index
 from recipes.models import Ingredient
 
+DEFAULT_FILE = os.path.join('assets/data', 'ingredients.csv')
 
-def read_csv(name_file):
-    """Считывает данные из csv и возвращает список строк таблицы."""
-    path = os.path.join('assets/data', name_file)
-    with open(path, encoding='utf-8') as csv_file:
+NAME_MAX_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_MAX_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+
+
+def read_csv(path, batch_size):
+    """Считывает csv по частям и возвращает пакеты строк таблицы."""
+    with open(path, encoding='utf-8', newline='') as csv_file:
         reader = csv.reader(csv_file, delimiter=',')
-        return list(reader)
+        while True:
+            batch = list(itertools.islice(reader, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def is_valid(row):
+    return (
+        len(row) == 2
+        and 0 < len(row[0]) <= NAME_MAX_LENGTH
+        and 0 < len(row[1]) <= UNIT_MAX_LENGTH
+    )
 
 
 class Command(BaseCommand):
@@ -25,32 +44,98 @@ class Command(BaseCommand):
             action='store_true',
             help='Удаляет все данные из таблицы'
         )
+        parser.add_argument(
+            '-f',
+            '--file',
+            default=DEFAULT_FILE,
+            help='Путь к csv-файлу (название, единица измерения)'
+        )
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк, загружаемых за один запрос'
+        )
 
     def handle(self, *args, **options):
         try:
             if options['clear']:
                 Ingredient.objects.all().delete()
+                invalidate_ingredient_index()
                 self.stdout.write(
                     self.style.SUCCESS(
                         'Таблица ингредиентов успешно очищена.'
                     )
                 )
             else:
-                table = read_csv('ingredients.csv')
-                Ingredient.objects.bulk_create(
-                    Ingredient(
-                        name=row[0], measurement_unit=row[1]
-                    ) for row in table
-                )
+                if connection.vendor == 'postgresql':
+                    total, inserted = self.copy(
+                        options['file'], options['batch_size']
+                    )
+                else:
+                    total, inserted = self.bulk_insert(
+                        options['file'], options['batch_size']
+                    )
+                invalidate_ingredient_index()
                 self.stdout.write(
                     self.style.SUCCESS(
-                        'Таблица ингредиентов загружена в базу данных.'
+                        'Таблица ингредиентов загружена в базу данных. '
+                        f'Строк в файле: {total}, добавлено: {inserted}, '
+                        f'пропущено (уже есть или некорректны): '
+                        f'{total - inserted}.'
                     )
                 )
-        except django.db.utils.IntegrityError as e:
-            self.stdout.write(
-                self.style.ERROR('Ошибка загрузки. База данных не пуста. '
-                                 'Совпадение уникальных полей. "%s"' % e))
         except Exception as e:
             self.stdout.write(self.style.ERROR('Ошибка загрузки данных:'
                                                ' "%s"' % e))
+
+    @transaction.atomic
+    def bulk_insert(self, path, batch_size):
+        """Загрузка пакетами с пропуском уже существующих ингредиентов."""
+        count_before = Ingredient.objects.count()
+        total = 0
+        for batch in read_csv(path, batch_size):
+            total += len(batch)
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=row[0], measurement_unit=row[1])
+                    for row in batch if is_valid(row)
+                ),
+                ignore_conflicts=True
+            )
+        return total, Ingredient.objects.count() - count_before
+
+    @transaction.atomic
+    def copy(self, path, batch_size):
+        """Загрузка через COPY во временную таблицу (PostgreSQL).
+
+        Строки проверяются так же, как при bulk_insert, и передаются
+        в COPY пакетами по batch_size строк.
+        """
+        table = Ingredient._meta.db_table
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for batch in read_csv(path, batch_size):
+                total += len(batch)
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    row for row in batch if is_valid(row)
+                )
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_staging '
+                'ON CONFLICT ON CONSTRAINT ingredient_measurement_unique '
+                'DO NOTHING'
+            )
+            return total, cursor.rowcount
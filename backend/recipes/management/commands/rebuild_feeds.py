@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заполнение лент подписок пользователей заново'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета при записи в базу данных'
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        created = rebuild_feeds(
+            FeedEntry, Recipe, Subscribe, settings.FEED_FANOUT_LIMIT,
+            settings.FEED_BACKFILL_LIMIT, options['batch_size'], User
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты подписок заполнены. Записей: {created}.'
+        ))
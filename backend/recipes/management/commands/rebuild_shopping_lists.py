@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересчет сумм ингредиентов в списках покупок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета при записи в базу данных'
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expected = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount
+            in ShoppingListItem.objects.calculate().iterator()
+        }
+        to_update = []
+        to_delete = []
+        items = ShoppingListItem.objects.select_for_update().only(
+            'id', 'user_id', 'ingredient_id', 'amount'
+        )
+        for item in items.iterator():
+            amount = expected.pop((item.user_id, item.ingredient_id), None)
+            if amount is None:
+                to_delete.append(item.id)
+            elif amount != item.amount:
+                item.amount = amount
+                to_update.append(item)
+        ShoppingListItem.objects.filter(id__in=to_delete).delete()
+        ShoppingListItem.objects.bulk_update(
+            to_update, ('amount',), batch_size=batch_size
+        )
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id,
+                    amount=amount
+                )
+                for (user_id, ingredient_id), amount in expected.items()
+            ),
+            batch_size=batch_size
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок пересчитаны. Добавлено: {len(expected)}, '
+            f'исправлено: {len(to_update)}, удалено: {len(to_delete)}.'
+        ))
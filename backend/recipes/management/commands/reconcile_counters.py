@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodgram.counters import reconcile_counters
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Пересчет счетчиков избранного, списков покупок, '
+            'рецептов и подписчиков')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        changed = reconcile_counters(
+            Recipe, User, Favorite, ShoppingCart, Subscribe
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики пересчитаны. Исправлено значений: {changed}.'
+        ))
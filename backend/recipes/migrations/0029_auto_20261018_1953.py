@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-18 19:53
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(related_model, related_field):
+    return Coalesce(
+        models.Subquery(
+            related_model.objects
+            .filter(**{related_field: models.OuterRef('pk')})
+            .order_by()
+            .values(related_field)
+            .annotate(count=models.Count('pk'))
+            .values('count'),
+            output_field=models.IntegerField()
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User = apps.get_model('users', 'User')
+    for model, field, related_model, related_field in (
+        (Recipe, 'favorites_count',
+         apps.get_model('recipes', 'Favorite'), 'recipe'),
+        (Recipe, 'carts_count',
+         apps.get_model('recipes', 'ShoppingCart'), 'recipe'),
+        (User, 'recipes_count', Recipe, 'author'),
+        (User, 'subscribers_count',
+         apps.get_model('users', 'Subscribe'), 'author'),
+    ):
+        model.objects.update(
+            **{field: count_subquery(related_model, related_field)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0028_auto_20261018_1951'),
+        ('users', '0014_auto_20261018_1953'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в списки покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
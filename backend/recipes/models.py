@@ -1,10 +1,24 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import Exists, OuterRef
+from django.db import models, router, transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    OuterRef,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
+from foodgram.counters import CountersModelMixin, count_subquery
 from recipes.validators import ColorHexCodeValidator
+from users.models import Subscribe
 
 User = get_user_model()
 
@@ -88,9 +102,34 @@ class RecipeQuerySet(models.QuerySet):
             )),
         )
 
+    def latest_per_author(self, author_ids, limit=None):
+        """Последние рецепты авторов, не более limit на каждого автора.
 
-class Recipe(models.Model):
+        Ограничение выполняется в базе данных через ROW_NUMBER()
+        по рецептам каждого автора.
+        """
+        queryset = self.filter(author__in=author_ids)
+        if limit is None:
+            return queryset
+        ranked = queryset.order_by().annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('pk').desc())
+            )
+        ).values('pk', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT "ranked"."id" FROM ({sql}) "ranked" '
+            'WHERE "ranked"."row_number" <= %s',
+            (*params, limit)
+        ))
+
+
+class Recipe(CountersModelMixin, models.Model):
     """Модель рецептов."""
+    counter_fields = ('favorites_count', 'carts_count')
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -122,6 +161,24 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         help_text='Обязательное поле'
     )
+    image_thumbnail = models.ImageField(
+        upload_to='recipes/renditions/',
+        verbose_name='Миниатюра изображения',
+        blank=True,
+        editable=False
+    )
+    image_card = models.ImageField(
+        upload_to='recipes/renditions/',
+        verbose_name='Изображение для карточки',
+        blank=True,
+        editable=False
+    )
+    image_full = models.ImageField(
+        upload_to='recipes/renditions/',
+        verbose_name='Изображение для страницы рецепта',
+        blank=True,
+        editable=False
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Обязательное поле'
@@ -136,9 +193,37 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False,
+        db_index=True
+    )
+    carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в списки покупок',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+        help_text=('Заполняется триггером PostgreSQL по названию '
+                   'и описанию рецепта')
+    )
     objects = RecipeQuerySet.as_manager()
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
@@ -147,6 +232,53 @@ class Recipe(models.Model):
         return self.name
 
 
+class RecipeIngredientQuerySet(models.QuerySet):
+    """QuerySet для модели RecipeIngredient."""
+
+    def sync(self, recipe_id, amounts):
+        """Приведение ингредиентов рецепта к ``amounts``.
+
+        ``amounts`` - словарь {id ингредиента: количество}. Добавляются,
+        изменяются и удаляются только отличающиеся строки. Возвращает
+        словарь {id ингредиента: (старое количество, новое количество)}
+        для измененных строк; отсутствующее значение равно None.
+        """
+        existing = {
+            ingredient_id: (pk, amount)
+            for pk, ingredient_id, amount in self.filter(
+                recipe_id=recipe_id
+            ).values_list('pk', 'ingredient_id', 'amount')
+        }
+        changes = {}
+        to_create = []
+        to_update = []
+        for ingredient_id, amount in amounts.items():
+            if ingredient_id not in existing:
+                to_create.append(RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=amount
+                ))
+                changes[ingredient_id] = (None, amount)
+                continue
+            pk, old_amount = existing[ingredient_id]
+            if old_amount != amount:
+                to_update.append(RecipeIngredient(pk=pk, amount=amount))
+                changes[ingredient_id] = (old_amount, amount)
+        to_delete = []
+        for ingredient_id, (pk, old_amount) in existing.items():
+            if ingredient_id not in amounts:
+                to_delete.append(pk)
+                changes[ingredient_id] = (old_amount, None)
+        if to_delete:
+            self.filter(pk__in=to_delete).delete()
+        if to_update:
+            self.bulk_update(to_update, ('amount',))
+        if to_create:
+            self.bulk_create(to_create)
+        return changes
+
+
 class RecipeIngredient(models.Model):
     """Промежуточная модель для ингредиентов в рецепте."""
     recipe = models.ForeignKey(
@@ -170,6 +302,7 @@ class RecipeIngredient(models.Model):
         verbose_name='Количество',
         help_text='Обязательное поле'
     )
+    objects = RecipeIngredientQuerySet.as_manager()
 
     class Meta:
         constraints = (
@@ -189,6 +322,117 @@ class RecipeIngredient(models.Model):
         )
 
 
+class BulkStatus:
+    """Результаты массового добавления и удаления рецептов."""
+    ADDED = 'added'
+    EXISTS = 'exists'
+    REMOVED = 'removed'
+    ABSENT = 'absent'
+    NOT_FOUND = 'not_found'
+
+
+class UserRecipeQuerySet(models.QuerySet):
+    """QuerySet для моделей избранного и списка покупок.
+
+    Массовые добавление и удаление выполняются несколькими запросами
+    независимо от количества рецептов и без сигналов моделей: счетчик
+    рецептов пересчитывается одним запросом. Все изменения списка одного
+    пользователя, в том числе добавление и удаление одного рецепта,
+    выполняются последовательно под блокировкой строки пользователя
+    (lock_user), поэтому статусы и изменения счетчиков вычисляются по
+    актуальному состоянию списка.
+    """
+    counter_field = None
+
+    def lock_user(self, user_id):
+        """Блокировка строки пользователя до конца транзакции."""
+        list(
+            User.objects.select_for_update()
+            .filter(pk=user_id).values_list('pk', flat=True)
+        )
+
+    def _update_counters(self, recipe_ids):
+        Recipe.objects.filter(pk__in=recipe_ids).update(**{
+            self.counter_field: count_subquery(
+                self.model.objects.all(), 'recipe'
+            )
+        })
+
+    def _recipes_added(self, user_id, recipe_ids):
+        self._update_counters(recipe_ids)
+
+    def _recipes_removed(self, user_id, recipe_ids):
+        self._update_counters(recipe_ids)
+
+    @transaction.atomic
+    def add_recipes(self, user_id, recipe_ids):
+        """Добавление рецептов в список пользователя.
+
+        Возвращает словарь {id рецепта: статус} (BulkStatus).
+        """
+        self.lock_user(user_id)
+        recipes = dict(
+            Recipe.objects
+            .filter(pk__in=recipe_ids)
+            .annotate(in_list=Exists(self.filter(
+                user_id=user_id, recipe_id=OuterRef('pk')
+            )))
+            .order_by()
+            .values_list('pk', 'in_list')
+        )
+        added = [pk for pk, in_list in recipes.items() if not in_list]
+        if added:
+            self.bulk_create(
+                self.model(user_id=user_id, recipe_id=pk) for pk in added
+            )
+            self._recipes_added(user_id, added)
+        return {
+            pk: (
+                BulkStatus.NOT_FOUND if pk not in recipes
+                else BulkStatus.EXISTS if recipes[pk]
+                else BulkStatus.ADDED
+            )
+            for pk in recipe_ids
+        }
+
+    @transaction.atomic
+    def remove_recipes(self, user_id, recipe_ids):
+        """Удаление рецептов из списка пользователя.
+
+        Строки удаляются одним запросом DELETE (_raw_delete): delete()
+        загрузил бы объекты и отправил сигналы pre_delete и post_delete
+        для каждой строки. Их работу (счетчики, список покупок) выполняет
+        _recipes_removed сразу для всех удаленных рецептов. Возвращает
+        словарь {id рецепта: статус} (BulkStatus).
+        """
+        self.lock_user(user_id)
+        rows = self.filter(user_id=user_id, recipe_id__in=recipe_ids)
+        removed = set(rows.values_list('recipe_id', flat=True))
+        if removed:
+            rows._raw_delete(router.db_for_write(self.model))
+            self._recipes_removed(user_id, removed)
+        return {
+            pk: BulkStatus.REMOVED if pk in removed else BulkStatus.ABSENT
+            for pk in recipe_ids
+        }
+
+
+class FavoriteQuerySet(UserRecipeQuerySet):
+    counter_field = 'favorites_count'
+
+
+class ShoppingCartQuerySet(UserRecipeQuerySet):
+    counter_field = 'carts_count'
+
+    def _recipes_added(self, user_id, recipe_ids):
+        super()._recipes_added(user_id, recipe_ids)
+        ShoppingListItem.objects.add_recipes(user_id, recipe_ids)
+
+    def _recipes_removed(self, user_id, recipe_ids):
+        super()._recipes_removed(user_id, recipe_ids)
+        ShoppingListItem.objects.add_recipes(user_id, recipe_ids, sign=-1)
+
+
 class Favorite(models.Model):
     """Модель избранного."""
     user = models.ForeignKey(
@@ -207,6 +451,7 @@ class Favorite(models.Model):
         db_index=True,
         help_text='Обязательное поле'
     )
+    objects = FavoriteQuerySet.as_manager()
 
     class Meta:
         constraints = (
@@ -245,6 +490,7 @@ class ShoppingCart(models.Model):
         db_index=True,
         help_text='Обязательное поле'
     )
+    objects = ShoppingCartQuerySet.as_manager()
 
     class Meta:
         constraints = (
@@ -263,3 +509,244 @@ class ShoppingCart(models.Model):
             f'Рецепт "{self.recipe}" в списке покупок '
             f'пользователя {self.user}'
         )
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    """QuerySet для модели ShoppingListItem."""
+
+    def apply_amounts(self, user_ids, amounts):
+        """Изменение сумм ингредиентов в списках покупок пользователей.
+
+        ``amounts`` - словарь {id ингредиента: изменение количества}.
+        """
+        user_ids = list(user_ids)
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        if not user_ids or not amounts:
+            return
+        self.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids for ingredient_id in amounts
+            ),
+            ignore_conflicts=True
+        )
+        items = self.filter(user_id__in=user_ids, ingredient_id__in=amounts)
+        items.update(amount=F('amount') + Case(
+            *(When(ingredient_id=ingredient_id, then=Value(amount))
+              for ingredient_id, amount in amounts.items()),
+            default=Value(0)
+        ))
+        items.filter(amount__lte=0).delete()
+
+    def add_recipe(self, user_id, recipe_id, sign=1):
+        """Добавление (или вычитание при sign=-1) ингредиентов рецепта."""
+        amounts = RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+        self.apply_amounts(
+            (user_id,),
+            {ingredient_id: sign * amount for ingredient_id, amount in amounts}
+        )
+
+    def add_recipes(self, user_id, recipe_ids, sign=1):
+        """Добавление (или вычитание) ингредиентов нескольких рецептов."""
+        amounts = (
+            RecipeIngredient.objects
+            .filter(recipe_id__in=recipe_ids)
+            .values('ingredient_id')
+            .annotate(total=Sum('amount'))
+            .values_list('ingredient_id', 'total')
+        )
+        self.apply_amounts(
+            (user_id,),
+            {ingredient_id: sign * total for ingredient_id, total in amounts}
+        )
+
+    def remove_recipe(self, user_id, recipe_id):
+        self.add_recipe(user_id, recipe_id, sign=-1)
+
+    def update_recipe(self, recipe_id, old_amounts, new_amounts):
+        """Учет изменения ингредиентов рецепта во всех списках покупок."""
+        amounts = {
+            ingredient_id: (new_amounts.get(ingredient_id, 0)
+                            - old_amounts.get(ingredient_id, 0))
+            for ingredient_id in {*old_amounts, *new_amounts}
+        }
+        user_ids = ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)
+        self.apply_amounts(user_ids, amounts)
+
+    def calculate(self):
+        """Суммы ингредиентов, вычисленные заново по спискам покупок."""
+        return (
+            RecipeIngredient.objects
+            .filter(recipe__carts__isnull=False)
+            .values('recipe__carts__user', 'ingredient')
+            .annotate(total=Sum('amount'))
+            .values_list('recipe__carts__user', 'ingredient', 'total')
+        )
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента в списке покупок пользователя.
+
+    Поддерживается при изменении списка покупок и ингредиентов
+    рецептов, находящихся в списках покупок.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+        db_index=True
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_lists',
+        verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество'
+    )
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='shopping_list_item_unique'
+            ),
+        )
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+
+    def __str__(self) -> str:
+        return (
+            f'{self.ingredient.name}, {self.amount} '
+            f'{self.ingredient.measurement_unit} в списке покупок '
+            f'пользователя {self.user}'
+        )
+
+
+class FeedEntryQuerySet(models.QuerySet):
+    """QuerySet для модели FeedEntry.
+
+    Рецепты авторов с флагом feed_pull читаются при запросе ленты,
+    рецепты остальных авторов записываются в ленты подписчиков. Флаг
+    устанавливается, когда подписчиков становится больше
+    FEED_FANOUT_LIMIT, и не снимается при отписках (иначе из лент
+    пропали бы рецепты, опубликованные с установленным флагом); его
+    пересчитывает команда rebuild_feeds.
+    """
+
+    def fan_out(self, recipe):
+        """Добавление рецепта в ленты подписчиков автора.
+
+        Вызывается синхронно после фиксации транзакции запроса,
+        создавшего рецепт, и записывает не больше FEED_FANOUT_LIMIT
+        строк (пакетами по FEED_FANOUT_BATCH_SIZE): у авторов с большим
+        количеством подписчиков установлен флаг feed_pull.
+        """
+        subscribers = Subscribe.objects.filter(
+            author_id=recipe.author_id, author__feed_pull=False
+        ).values_list('user_id', flat=True)
+        self.bulk_create(
+            (
+                FeedEntry(user_id=user_id, recipe_id=recipe.pk,
+                          pub_date=recipe.pub_date)
+                for user_id in subscribers.iterator()
+            ),
+            batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+    def add_author(self, user_id, author_id):
+        """Добавление последних рецептов автора в ленту подписчика.
+
+        Автор, у которого подписчиков стало больше FEED_FANOUT_LIMIT,
+        получает флаг feed_pull. Подписки считаются по таблице: счетчик
+        подписчиков увеличивает обработчик users.signals, который
+        выполняется после этого.
+        """
+        limit = settings.FEED_FANOUT_LIMIT
+        User.objects.filter(
+            Exists(Subscribe.objects.filter(
+                author_id=author_id
+            ).order_by()[limit:limit + 1]),
+            pk=author_id, feed_pull=False
+        ).update(feed_pull=True)
+        recipes = (
+            Recipe.objects
+            .filter(author_id=author_id, author__feed_pull=False)
+            .order_by('-pub_date', '-id')
+            .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_LIMIT]
+        )
+        self.bulk_create(
+            (
+                FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                          pub_date=pub_date)
+                for recipe_id, pub_date in recipes
+            ),
+            ignore_conflicts=True
+        )
+
+    def remove_author(self, user_id, author_id):
+        self.filter(user_id=user_id, recipe__author_id=author_id).delete()
+
+    @staticmethod
+    def get_pull_authors(user_id):
+        """Авторы, рецепты которых читаются при запросе ленты."""
+        return Subscribe.objects.filter(
+            user_id=user_id, author__feed_pull=True
+        ).values_list('author_id', flat=True)
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписок пользователя.
+
+    Записи создаются при публикации рецепта (fan-out on write), поэтому
+    страница ленты читается по индексу без объединения подписок
+    и рецептов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='feed_entry_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_user_pub_date_idx'
+            ),
+        )
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи лент подписок'
+
+    def __str__(self) -> str:
+        return f'Рецепт "{self.recipe}" в ленте пользователя {self.user}'
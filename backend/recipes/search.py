@@ -0,0 +1,58 @@
+import bisect
+
+from foodgram.db import replica_reads
+from recipes import cache
+from recipes.models import Ingredient
+from recipes.serializers import IngredientSerializer
+
+MAX_CHAR = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для поиска по началу названия.
+
+    Актуальность проверяется по версии в общем кэше: при изменении
+    ингредиентов версия меняется, и каждый процесс перестраивает индекс
+    при следующем поиске. В индексе хранятся уже сериализованные
+    IngredientSerializer данные.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._index = ((), ())
+
+    def rebuild(self, version=None):
+        with replica_reads(False):
+            data = IngredientSerializer(
+                Ingredient.objects.all(), many=True
+            ).data
+        ingredients = sorted(
+            (dict(item) for item in data),
+            key=lambda item: (item['name'].casefold(),
+                              item['measurement_unit'])
+        )
+        keys = tuple(item['name'].casefold() for item in ingredients)
+        self._index = (keys, tuple(ingredients))
+        self._version = version
+
+    def _actualize(self):
+        version = cache.get_ingredient_index_version()
+        if version != self._version:
+            self.rebuild(version)
+
+    def search(self, prefix='', limit=None):
+        """Ингредиенты, название которых начинается с prefix."""
+        self._actualize()
+        keys, items = self._index
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            start, stop = 0, len(items)
+        else:
+            start = bisect.bisect_left(keys, prefix)
+            stop = bisect.bisect_left(keys, prefix + MAX_CHAR, lo=start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return list(items[start:stop])
+
+
+ingredient_index = IngredientIndex()
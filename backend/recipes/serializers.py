@@ -1,10 +1,13 @@
-import logging
-
+from django.conf import settings
 from django.db import transaction
-from drf_extra_fields.fields import Base64ImageField
-from drf_extra_fields.relations import PresentablePrimaryKeyRelatedField
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
 
+from foodgram.annotations import missing_annotation
+from recipes.fields import (
+    BulkPresentablePrimaryKeyRelatedField,
+    RenditionImageField,
+)
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -13,6 +16,7 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.signals import recipe_ingredients_changed
 from recipes.validators import RecipeUniqueValidator
 from users.serializers import CustomUserSerializer
 
@@ -23,6 +27,7 @@ class ErrorMessage:
         {'ingrediens': [('Одинаковые ингредиенты с одинаковой '
                          'единицей измерения не должны повторяться')]}
     )
+    INGREDIENT_DOES_NOT_EXIST_ERROR = 'Ингредиент с id {} не существует'
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -41,6 +46,33 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """Проверка ингредиентов рецепта одним запросом.
+
+    Вместо id в validated_data передаются найденные объекты Ingredient.
+    """
+
+    def to_internal_value(self, data):
+        ingredients = super().to_internal_value(data)
+        objects = Ingredient.objects.in_bulk({
+            ingredient['ingredient']['id'] for ingredient in ingredients
+        })
+        errors = []
+        for ingredient in ingredients:
+            pk = ingredient['ingredient']['id']
+            if pk not in objects:
+                errors.append({'id': [ErrorDetail(
+                    ErrorMessage.INGREDIENT_DOES_NOT_EXIST_ERROR.format(pk),
+                    code='does_not_exist'
+                )]})
+                continue
+            ingredient['ingredient'] = objects[pk]
+            errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ingredients
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для промежуточной модели ингредиентов в рецепте."""
     id = serializers.IntegerField(source='ingredient.id')
@@ -53,6 +85,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = RecipeIngredientListSerializer
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -60,8 +93,10 @@ class RecipeSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(many=True,
                                              source='recipe_ingredients')
-    image = Base64ImageField()
-    tags = PresentablePrimaryKeyRelatedField(
+    image = RenditionImageField(rendition={
+        'list': 'card', 'feed': 'card', None: 'full'
+    })
+    tags = BulkPresentablePrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         presentation_serializer=TagSerializer,
         read_source=None,
@@ -76,22 +111,13 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'is_favorited', 'is_in_shopping_cart',
                   'name', 'image', 'text', 'cooking_time')
 
-    def logger_warning(self, field):
-        """Предупреждение об отсутствии ожидаемого аннотированного поля."""
-        request = self.context['request']
-        return (
-            f'{request.path}: Запрос к базе данных не оптимален. '
-            f'В {self.__class__.__name__} в переданном queryset '
-            f'не аннотировано поле {field}'
-        )
-
     def get_is_favorited(self, obj):
         request = self.context['request']
         if not request.user.is_authenticated:
             return False
         field = 'is_favorited'
         if not hasattr(obj, field):
-            logging.warning(self.logger_warning(field))
+            missing_annotation(self, field)
             return obj.followers.filter(user=request.user).exists()
         return obj.is_favorited
 
@@ -101,7 +127,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             return False
         field = 'is_in_shopping_cart'
         if not hasattr(obj, field):
-            logging.warning(self.logger_warning(field))
+            missing_annotation(self, field)
             return obj.carts.filter(user=request.user).exists()
         return obj.is_in_shopping_cart
 
@@ -113,7 +139,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         ingredient_list = []
         for ingredient in ingredients:
-            ingredient_list.append(ingredient.get('ingredient').get('id'))
+            ingredient_list.append(ingredient.get('ingredient').id)
         if len(ingredient_list) > len(set(ingredient_list)):
             raise serializers.ValidationError(
                 ErrorMessage.INGREDIENTS_REOCCURRENCE_ERROR
@@ -124,7 +150,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         RecipeIngredient.objects.bulk_create([
             RecipeIngredient(
                 recipe=recipe,
-                ingredient_id=ingredient.get('ingredient').get('id'),
+                ingredient=ingredient.get('ingredient'),
                 amount=ingredient.get('amount')
             ) for ingredient in ingredients
         ])
@@ -148,8 +174,13 @@ class RecipeSerializer(serializers.ModelSerializer):
         if tags:
             instance.tags.set(tags)
         if ingredients:
-            instance.ingredients.clear()
-            self.create_ingredients(instance, ingredients)
+            changes = RecipeIngredient.objects.sync(instance.pk, {
+                ingredient.get('ingredient').id: ingredient.get('amount')
+                for ingredient in ingredients
+            })
+            recipe_ingredients_changed.send(
+                sender=Recipe, recipe_id=instance.pk, changes=changes
+            )
         return super().update(instance, validated_data)
 
 
@@ -157,7 +188,9 @@ class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор для модели избранных рецептов."""
     id = serializers.IntegerField(source='recipe.id', read_only=True)
     name = serializers.CharField(source='recipe.name', read_only=True)
-    image = Base64ImageField(source='recipe.image', read_only=True)
+    image = RenditionImageField(
+        source='recipe.image', rendition='thumbnail', read_only=True
+    )
     cooking_time = serializers.IntegerField(source='recipe.cooking_time',
                                             read_only=True)
 
@@ -166,12 +199,18 @@ class FavoriteSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
         validators = (RecipeUniqueValidator(),)
 
+    @transaction.atomic
+    def create(self, validated_data):
+        return super().create(validated_data)
+
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
     """Сериализатор для модели списка покупок."""
     id = serializers.IntegerField(source='recipe.id', read_only=True)
     name = serializers.CharField(source='recipe.name', read_only=True)
-    image = Base64ImageField(source='recipe.image', read_only=True)
+    image = RenditionImageField(
+        source='recipe.image', rendition='thumbnail', read_only=True
+    )
     cooking_time = serializers.IntegerField(source='recipe.cooking_time',
                                             read_only=True)
 
@@ -179,3 +218,20 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         model = ShoppingCart
         fields = ('id', 'name', 'image', 'cooking_time')
         validators = (RecipeUniqueValidator(),)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        return super().create(validated_data)
+
+
+class BulkRecipesSerializer(serializers.Serializer):
+    """Сериализатор для массового добавления и удаления рецептов."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        """Повторяющиеся id учитываются один раз."""
+        return list(dict.fromkeys(value))
@@ -0,0 +1,193 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+
+from foodgram.counters import update_counter
+from recipes import cache
+from recipes.images import RENDITION_FIELDS, schedule_renditions
+from recipes.models import (
+    Favorite,
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag,
+)
+from users.models import Subscribe
+
+User = get_user_model()
+
+AUTHOR_SERIALIZED_FIELDS = frozenset(
+    ('email', 'username', 'first_name', 'last_name')
+)
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'carts_count',
+}
+
+# Изменение ингредиентов рецепта. Аргументы: recipe_id и changes -
+# словарь {id ингредиента: (старое количество, новое количество)} только
+# для измененных строк; отсутствующее значение равно None.
+recipe_ingredients_changed = Signal()
+
+
+def invalidate_recipes_on_commit(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: cache.invalidate_recipes(recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_recipes_on_commit((instance.pk,))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_recipes_on_commit((instance.recipe_id,))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_recipes_on_commit((instance.pk,))
+    else:
+        transaction.on_commit(cache.invalidate_catalog)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(cache.invalidate_catalog)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    """Сброс кэша рецептов автора при изменении отображаемых данных."""
+    if created or (
+        update_fields is not None
+        and AUTHOR_SERIALIZED_FIELDS.isdisjoint(update_fields)
+    ):
+        return
+    recipe_ids = instance.recipes.values_list('pk', flat=True)
+    if recipe_ids:
+        invalidate_recipes_on_commit(recipe_ids)
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def recipe_ingredients_updated(sender, recipe_id, changes, **kwargs):
+    """Учет измененных ингредиентов рецепта в списках покупок."""
+    if not changes:
+        return
+    invalidate_recipes_on_commit((recipe_id,))
+    ShoppingListItem.objects.update_recipe(
+        recipe_id,
+        {pk: old for pk, (old, new) in changes.items() if old is not None},
+        {pk: new for pk, (old, new) in changes.items() if new is not None}
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    if created:
+        ShoppingListItem.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance, **kwargs):
+    ShoppingListItem.objects.remove_recipe(
+        instance.user_id, instance.recipe_id
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    transaction.on_commit(cache.invalidate_ingredient_index)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(sender, instance, **kwargs):
+    update_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_follower_added(sender, instance, created, **kwargs):
+    if created:
+        update_counter(
+            Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_follower_removed(sender, instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_uploading(sender, instance, **kwargs):
+    """Сброс копий изображения при загрузке нового изображения.
+
+    Файлы сброшенных копий удаляются после создания новых.
+    """
+    instance._image_uploaded = bool(
+        instance.image and not instance.image._committed
+    )
+    if instance._image_uploaded:
+        deferred = instance.get_deferred_fields()
+        instance._stale_renditions = tuple(
+            getattr(instance, field).name for field in RENDITION_FIELDS
+            if field not in deferred and getattr(instance, field)
+        )
+        for field in RENDITION_FIELDS:
+            setattr(instance, field, '')
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_uploaded(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        schedule_renditions(instance.pk, instance._stale_renditions)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: FeedEntry.objects.fan_out(instance))
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_added(sender, instance, created, **kwargs):
+    if created:
+        FeedEntry.objects.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_removed(sender, instance, **kwargs):
+    FeedEntry.objects.remove_author(instance.user_id, instance.author_id)
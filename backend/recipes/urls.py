@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from foodgram.async_views import async_read_urls
 from recipes.views import IngredientViewSet, RecipeViewSet, TagViewSet
 
 app_name = 'recipes'
@@ -10,6 +11,11 @@ router.register(r'tags', TagViewSet, 'tags')
 router.register(r'recipes', RecipeViewSet, 'recipes')
 router.register(r'ingredients', IngredientViewSet, 'ingredients')
 
+ASYNC_READ_ROUTES = (
+    'tags-list', 'tags-detail', 'ingredients-list', 'ingredients-detail',
+    'recipes-list', 'recipes-detail', 'recipes-feed',
+)
+
 urlpatterns = [
-    path('api/', include(router.urls)),
+    path('api/', include(async_read_urls(router.urls, ASYNC_READ_ROUTES))),
 ]
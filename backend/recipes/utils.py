@@ -1,3 +1,4 @@
+import functools
 import io
 import os
 
@@ -8,6 +9,8 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+from foodgram.metrics import PDF_GENERATION_DURATION
+
 
 class PDFSettings:
     FONT_FILE = os.path.join(settings.FONTS_DIR, 'freesansbold.ttf')
@@ -15,17 +18,25 @@ class PDFSettings:
     FILENAME = 'shopping_list.pdf'
 
 
+@functools.lru_cache(maxsize=None)
+def register_font():
+    """Регистрация шрифта (один раз за время жизни процесса)."""
+    pdfmetrics.registerFont(TTFont(PDFSettings.FONT, PDFSettings.FONT_FILE))
+
+
+@PDF_GENERATION_DURATION.time()
 def pdf_cart(ingredients: QuerySet) -> FileResponse:
     """Создание pdf со списком покупок."""
-
+    register_font()
     buffer = io.BytesIO()
     pdf = canvas.Canvas(buffer)
-    pdfmetrics.registerFont(TTFont(PDFSettings.FONT, PDFSettings.FONT_FILE))
     pdf.setFont(PDFSettings.FONT, 24)
     pdf.drawString(70, 800, 'Список покупок')
     pdf.line(40, 790, 560, 790)
     pdf.setFontSize(14)
     y_coord = 700
+    if isinstance(ingredients, QuerySet):
+        ingredients = ingredients.iterator()
     for ingredient in ingredients:
         if y_coord < 70:
             pdf.showPage()
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef, Prefetch, Sum
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -10,10 +12,28 @@ from rest_framework.permissions import (
 )
 from rest_framework.response import Response
 
-from recipes.filters import IngredientSearchFilter, RecipeFilter
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from foodgram.db import replica_reads
+from foodgram.metrics import observe_cache
+from foodgram.pagination import (
+    MergedKeysetPagination,
+    PageNumberOrKeysetPagination,
+)
+from recipes import cache
+from recipes.filters import RecipeFilter
+from recipes.models import (
+    Favorite,
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag,
+)
 from recipes.permissions import IsOwnerOrReadOnly
+from recipes.search import ingredient_index
 from recipes.serializers import (
+    BulkRecipesSerializer,
     FavoriteSerializer,
     IngredientSerializer,
     RecipeSerializer,
@@ -37,9 +57,18 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет для просмотра ингредиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
     pagination_class = None
+    search_param = 'name'
+
+    def list(self, request, *args, **kwargs):
+        """Поиск ингредиентов по началу названия без запроса к БД.
+
+        Без параметра name отдаются первые по алфавиту ингредиенты.
+        """
+        return Response(ingredient_index.search(
+            request.query_params.get(self.search_param, ''),
+            settings.INGREDIENT_SEARCH_LIMIT
+        ))
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -49,6 +78,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = PageNumberOrKeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -56,7 +86,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return (
-                Recipe.objects.all().select_related('author')
+                Recipe.objects.defer('search_vector').select_related('author')
                 .prefetch_related(
                     'tags',
                     Prefetch(
@@ -66,7 +96,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     ))
             )
         return (
-            Recipe.objects
+            Recipe.objects.defer('search_vector')
             .add_is_favorited(self.request.user)
             .add_is_in_shopping_cart(self.request.user)
             .prefetch_related(
@@ -88,12 +118,43 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         )
 
+    def _cached_response(self, key, view_method, request, *args, **kwargs):
+        data = cache.get_cached_data(key)
+        observe_cache('recipes', data is not None)
+        if data is not None:
+            return Response(data)
+        with replica_reads(False):
+            response = view_method(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set_cached_data(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов (для анонимных пользователей кэшируется)."""
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return self._cached_response(
+            cache.get_list_key(request), super().list,
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Просмотр рецепта (для анонимных пользователей кэшируется)."""
+        pk = kwargs[self.lookup_field]
+        if request.user.is_authenticated or not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self._cached_response(
+            cache.get_detail_key(request, int(pk)),
+            super().retrieve, request, *args, **kwargs
+        )
+
+    @transaction.atomic
     def _create_delete_obj(self, request, pk=None):
+        model = self.serializer_class.Meta.model
+        # Та же блокировка, что и при массовых изменениях списка.
+        model.objects.lock_user(request.user.id)
         if self.request.method == 'DELETE':
-            obj = get_object_or_404(
-                self.serializer_class.Meta.model,
-                user=request.user, recipe=pk
-            )
+            obj = get_object_or_404(model, user=request.user, recipe=pk)
             obj.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = self.get_serializer(data=request.data)
@@ -120,14 +181,72 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Добавление/удаление рецепта в списке покупок."""
         return self._create_delete_obj(request, pk)
 
+    def _bulk_add_remove(self, request, model):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'DELETE':
+            results = model.objects.remove_recipes(request.user.id, recipe_ids)
+        else:
+            results = model.objects.add_recipes(request.user.id, recipe_ids)
+        return Response(
+            [{'id': pk, 'status': results[pk]} for pk in recipe_ids]
+        )
+
+    @action(
+        ('post', 'delete'), detail=False, url_path='favorite',
+        serializer_class=BulkRecipesSerializer,
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_favorite(self, request):
+        """Добавление/удаление нескольких рецептов в избранном."""
+        return self._bulk_add_remove(request, Favorite)
+
+    @action(
+        ('post', 'delete'), detail=False, url_path='shopping_cart',
+        serializer_class=BulkRecipesSerializer,
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_shopping_cart(self, request):
+        """Добавление/удаление нескольких рецептов в списке покупок."""
+        return self._bulk_add_remove(request, ShoppingCart)
+
+    @action(('get',), detail=False, permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+
+        Рецепты читаются из ленты пользователя, рецепты авторов
+        с большим количеством подписчиков - из таблицы рецептов.
+        """
+        paginator = MergedKeysetPagination(self.paginator.page_size)
+        entries = FeedEntry.objects.filter(user=request.user)
+        pull_authors = list(FeedEntry.objects.get_pull_authors(
+            request.user.id
+        ))
+        if pull_authors:
+            # Записи, созданные до установки флага feed_pull автора.
+            entries = entries.exclude(recipe__author__in=pull_authors)
+        sources = [(entries, ('pub_date', 'recipe_id'))]
+        if pull_authors:
+            sources.append((
+                Recipe.objects.filter(author__in=pull_authors),
+                ('pub_date', 'id')
+            ))
+        page = paginator.paginate_sources(
+            self.get_queryset(), sources, request, self
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(('get',), detail=False, permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
         """Скачивание pdf-файла со списком покупок."""
         ingredients = (
-            RecipeIngredient.objects
-            .filter(recipe__carts__user=request.user)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(amount=Sum('amount'))
+            ShoppingListItem.objects
+            .filter(user=request.user)
+            .values(
+                'ingredient__name', 'ingredient__measurement_unit', 'amount'
+            )
             .order_by('ingredient__name')
         )
         return pdf_cart(ingredients)
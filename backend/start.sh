@@ -1,4 +1,4 @@
 #!/bin/sh
 
 python manage.py collectstatic --no-input
-gunicorn foodgram.wsgi:application --bind 0:8000
\ No newline at end of file
+exec gunicorn --config python:foodgram.gunicorn_conf
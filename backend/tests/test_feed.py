@@ -0,0 +1,119 @@
+"""Поведение ленты подписок для авторов с записью и чтением рецептов."""
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import FeedEntry, Recipe
+
+User = get_user_model()
+
+FANOUT_LIMIT = 2
+
+
+@override_settings(FEED_FANOUT_LIMIT=FANOUT_LIMIT)
+class FeedTest(APITestCase):
+    """Рецепты авторов, у которых подписчиков не больше FANOUT_LIMIT,
+    записываются в ленты; остальные читаются при запросе ленты."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.other_author = cls.create_user('other')
+        cls.subscribers = [
+            cls.create_user(f'subscriber{number}')
+            for number in range(FANOUT_LIMIT + 1)
+        ]
+        cls.old_recipe = cls.publish(cls.author)
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com',
+            first_name='Имя', last_name='Фамилия', password='!'
+        )
+
+    @staticmethod
+    def publish(author):
+        return Recipe.objects.create(
+            author=author, name='Рецепт', text='Описание', cooking_time=1,
+            image='recipes/placeholder.png'
+        )
+
+    def get_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def subscribe(self, user, author, method='post'):
+        response = getattr(self.get_client(user), method)(
+            f'/api/users/{author.id}/subscribe/'
+        )
+        self.assertIn(response.status_code, (
+            status.HTTP_201_CREATED, status.HTTP_204_NO_CONTENT
+        ))
+
+    def get_feed(self, user):
+        response = self.get_client(user).get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def get_expected(self, user):
+        return list(
+            Recipe.objects
+            .filter(author__subscribers__user=user)
+            .order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+
+    def publish_on_commit(self, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.publish(author)
+
+    def test_push_author(self):
+        user = self.subscribers[0]
+        self.subscribe(user, self.author)
+        self.subscribe(user, self.other_author)
+        self.assertEqual(self.get_feed(user), [self.old_recipe.id])
+        recipe = self.publish_on_commit(self.author)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=user, recipe=recipe
+        ).exists())
+        other_recipe = self.publish_on_commit(self.other_author)
+        self.assertEqual(
+            self.get_feed(user),
+            [other_recipe.id, recipe.id, self.old_recipe.id]
+        )
+        self.subscribe(user, self.other_author, 'delete')
+        self.assertEqual(self.get_feed(user), self.get_expected(user))
+
+    def test_pull_author(self):
+        for user in self.subscribers:
+            self.subscribe(user, self.author)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.feed_pull)
+        recipe = self.publish_on_commit(self.author)
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        for user in self.subscribers:
+            self.assertEqual(
+                self.get_feed(user), [recipe.id, self.old_recipe.id]
+            )
+        # Рецепты, опубликованные в режиме чтения, остаются в лентах
+        # и после отписок.
+        self.subscribe(self.subscribers[-1], self.author, 'delete')
+        for user in self.subscribers[:-1]:
+            self.assertEqual(
+                self.get_feed(user), [recipe.id, self.old_recipe.id]
+            )
+        self.assertEqual(self.get_feed(self.subscribers[-1]), [])
+
+    def test_card_image(self):
+        user = self.subscribers[0]
+        self.subscribe(user, self.author)
+        Recipe.objects.filter(pk=self.old_recipe.pk).update(
+            image_card='recipes/renditions/card.jpg'
+        )
+        response = self.get_client(user).get('/api/recipes/feed/')
+        self.assertTrue(
+            response.data['results'][0]['image'].endswith('card.jpg')
+        )
@@ -0,0 +1,405 @@
+"""Бюджеты производительности эндпоинтов API.
+
+Для каждого эндпоинта проверяется точное количество запросов к базе
+данных (вместе с обработчиками on_commit) и медиана времени ответа;
+бюджеты времени умножаются на PERFORMANCE_LATENCY_FACTOR.
+"""
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from foodgram.annotations import AnnotationMode
+from foodgram.counters import reconcile_counters
+from recipes.cache import invalidate_catalog
+from recipes.feed import rebuild_feeds
+from recipes.models import (
+    Favorite,
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag,
+)
+from recipes.search import ingredient_index
+from users.models import Subscribe
+
+User = get_user_model()
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+OK = status.HTTP_200_OK
+CREATED = status.HTTP_201_CREATED
+DELETED = status.HTTP_204_NO_CONTENT
+UNAUTHORIZED = status.HTTP_401_UNAUTHORIZED
+
+
+class Dataset:
+    """Параметры набора данных для проверки производительности."""
+    USERS = 30
+    TAGS = 5
+    INGREDIENTS = 500
+    RECIPES_PER_AUTHOR = 8
+    INGREDIENTS_PER_RECIPE = 8
+    FAVORITES_PER_USER = 10
+    CART_RECIPES = 10
+    SUBSCRIPTIONS = 10
+    BULK_RECIPES = 20
+    CURSOR_PAGE_SIZE = 6
+    DEEP_CURSOR_PAGE = 30
+
+
+def bulk_create(model, objs):
+    """Создание объектов в пустой таблице; возвращает их с первичными ключами.
+
+    Не все базы данных возвращают первичные ключи из bulk_create.
+    """
+    model.objects.bulk_create(objs)
+    return list(model.objects.order_by('pk'))
+
+
+def seed():
+    """Заполнение базы данных набором данных из Dataset."""
+    users = bulk_create(User, [
+        User(
+            username=f'user{number}', email=f'user{number}@example.com',
+            first_name='Имя', last_name='Фамилия', password='!'
+        )
+        for number in range(Dataset.USERS)
+    ])
+    tags = bulk_create(Tag, [
+        Tag(name=f'Тег {number}', color='#49B64E', slug=f'tag{number}')
+        for number in range(Dataset.TAGS)
+    ])
+    ingredients = bulk_create(Ingredient, [
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(Dataset.INGREDIENTS)
+    ])
+    recipes = bulk_create(Recipe, [
+        Recipe(
+            author=author, name=f'Рецепт {number} {author.username}',
+            text='Описание', cooking_time=number + 1,
+            image='recipes/placeholder.png'
+        )
+        for author in users for number in range(Dataset.RECIPES_PER_AUTHOR)
+    ])
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(
+            recipe=recipe, tag=tags[number % Dataset.TAGS]
+        )
+        for number, recipe in enumerate(recipes)
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=ingredients[
+                (number * Dataset.INGREDIENTS_PER_RECIPE + offset)
+                % Dataset.INGREDIENTS
+            ],
+            amount=offset + 1
+        )
+        for number, recipe in enumerate(recipes)
+        for offset in range(Dataset.INGREDIENTS_PER_RECIPE)
+    )
+    for model, count in (
+        (Favorite, Dataset.FAVORITES_PER_USER),
+        (ShoppingCart, Dataset.CART_RECIPES),
+    ):
+        model.objects.bulk_create(
+            model(user=user, recipe=recipes[-(number + 1) * 3])
+            for user in users for number in range(count)
+        )
+    Subscribe.objects.bulk_create(
+        Subscribe(user=user, author=users[(number + offset + 1) % len(users)])
+        for number, user in enumerate(users)
+        for offset in range(Dataset.SUBSCRIPTIONS)
+    )
+    reconcile_counters(Recipe, User, Favorite, ShoppingCart, Subscribe)
+    rebuild_feeds(
+        FeedEntry, Recipe, Subscribe, settings.FEED_FANOUT_LIMIT,
+        settings.FEED_BACKFILL_LIMIT, user_model=User
+    )
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                         amount=amount)
+        for user_id, ingredient_id, amount
+        in ShoppingListItem.objects.calculate()
+    )
+    return users[0], tags, ingredients
+
+
+class PerformanceBudgetTest(APITestCase):
+    """Количество запросов к базе данных и время ответа эндпоинтов.
+
+    Каждый запрос повторяется REPEAT раз после одного прогревочного.
+    Перед запросами авторизованного пользователя кэш очищается, поэтому
+    учитывается проверка токена по базе данных; кэш ответов анонимным
+    пользователям сбрасывается перед каждым запросом.
+    """
+    REPEAT = 5
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.TemporaryDirectory()
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root.name,
+            ANNOTATION_STRICT_MODE=AnnotationMode.RAISE
+        )
+        cls.settings_override.enable()
+        # Копии изображений создаются в фоновом потоке вне транзакции
+        # теста и в бюджет запроса не входят.
+        cls.renditions_patcher = mock.patch(
+            'recipes.signals.schedule_renditions'
+        )
+        cls.renditions_patcher.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.renditions_patcher.stop()
+        cls.settings_override.disable()
+        cls.media_root.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.tags, cls.ingredients = seed()
+        cls.token = Token.objects.create(user=cls.user)
+        cls.author = User.objects.exclude(
+            subscribers__user=cls.user
+        ).exclude(pk=cls.user.pk).first()
+        cls.recipe = cls.user.recipes.first()
+        cls.other_recipe = Recipe.objects.exclude(
+            followers__user=cls.user
+        ).exclude(carts__user=cls.user).first()
+        cls.bulk_recipes = list(
+            Recipe.objects.exclude(followers__user=cls.user)
+            .exclude(carts__user=cls.user)
+            .values_list('pk', flat=True)[:Dataset.BULK_RECIPES]
+        )
+
+    def get_client(self, authenticated):
+        client = APIClient()
+        if authenticated:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        return client
+
+    def prepare(self, authenticated):
+        if authenticated:
+            cache.clear()
+            # Индекс ингредиентов строится один раз на процесс.
+            ingredient_index.search()
+        invalidate_catalog()
+
+    def request(self, client, method, url, data):
+        response = getattr(client, method)(url, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def check_budget(self, method, url, status_code, queries, latency,
+                     authenticated=True, data=None, setup=None,
+                     teardown=None):
+        """Проверка бюджетов запроса к эндпоинту.
+
+        queries - точное количество запросов к базе данных,
+        latency - максимальная медиана времени ответа в миллисекундах.
+        """
+        client = self.get_client(authenticated)
+        timings = []
+        for attempt in range(self.REPEAT + 1):
+            if setup is not None:
+                setup()
+            self.prepare(authenticated)
+            with self.captureOnCommitCallbacks(execute=True):
+                if attempt:
+                    started = time.perf_counter()
+                    with self.assertNumQueries(queries):
+                        response = self.request(client, method, url, data)
+                    timings.append((time.perf_counter() - started) * 1000)
+                else:
+                    response = self.request(client, method, url, data)
+            self.assertEqual(
+                response.status_code, status_code,
+                getattr(response, 'data', None)
+            )
+            if teardown is not None:
+                teardown(response)
+        median = statistics.median(timings)
+        self.assertLessEqual(
+            median, latency * settings.PERFORMANCE_LATENCY_FACTOR,
+            f'{method.upper()} {url}: медиана времени ответа {median:.1f} мс'
+        )
+
+    def add(self, model):
+        return lambda: model.objects.create(
+            user=self.user, recipe=self.other_recipe
+        )
+
+    def remove(self, model):
+        return lambda response: model.objects.filter(
+            user=self.user, recipe=self.other_recipe
+        ).delete()
+
+    def bulk_add(self, model):
+        return lambda: model.objects.add_recipes(
+            self.user.id, self.bulk_recipes
+        )
+
+    def bulk_remove(self, model):
+        return lambda response: model.objects.remove_recipes(
+            self.user.id, self.bulk_recipes
+        )
+
+    def get_recipe_data(self):
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 5}
+                for ingredient
+                in self.ingredients[:Dataset.INGREDIENTS_PER_RECIPE]
+            ],
+        }
+
+    def test_recipes_list(self):
+        self.check_budget('get', '/api/recipes/', OK, 4, 150,
+                          authenticated=False)
+        self.check_budget('get', '/api/recipes/', OK, 6, 150)
+
+    def test_recipes_list_filters(self):
+        self.check_budget(
+            'get',
+            f'/api/recipes/?tags={self.tags[0].slug}&tags={self.tags[1].slug}'
+            '&is_favorited=1&is_in_shopping_cart=0',
+            OK, 7, 150
+        )
+
+    def test_recipes_list_cursor(self):
+        url = f'/api/recipes/?cursor=&limit={Dataset.CURSOR_PAGE_SIZE}'
+        self.check_budget('get', url, OK, 3, 150, authenticated=False)
+        self.check_budget('get', url, OK, 5, 150)
+
+    def test_recipes_list_deep_cursor(self):
+        url = f'/api/recipes/?cursor=&limit={Dataset.CURSOR_PAGE_SIZE}'
+        client = self.get_client(authenticated=False)
+        for _ in range(Dataset.DEEP_CURSOR_PAGE):
+            url = client.get(url).data['next']
+        self.assertIsNotNone(url)
+        self.check_budget('get', url, OK, 3, 150, authenticated=False)
+        self.check_budget('get', url, OK, 5, 150)
+
+    def test_recipe_detail(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.check_budget('get', url, OK, 3, 100, authenticated=False)
+        self.check_budget('get', url, OK, 5, 100)
+
+    def test_recipes_feed(self):
+        self.check_budget('get', '/api/recipes/feed/', OK, 7, 150)
+        self.check_budget('get', '/api/recipes/feed/', UNAUTHORIZED, 0, 50,
+                          authenticated=False)
+
+    def test_recipe_create(self):
+        def delete_created_recipe(response):
+            Recipe.objects.filter(pk=response.data['id']).delete()
+
+        self.check_budget('post', '/api/recipes/', CREATED, 21, 300,
+                          data=self.get_recipe_data(),
+                          teardown=delete_created_recipe)
+        self.check_budget('post', '/api/recipes/', UNAUTHORIZED, 0, 50,
+                          authenticated=False, data=self.get_recipe_data())
+
+    def test_recipe_update(self):
+        self.check_budget('patch', f'/api/recipes/{self.recipe.id}/', OK, 22,
+                          300, data=self.get_recipe_data())
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.other_recipe.id}/favorite/'
+        self.check_budget('post', url, CREATED, 10, 100,
+                          teardown=self.remove(Favorite))
+        self.check_budget('delete', url, DELETED, 7, 100,
+                          setup=self.add(Favorite))
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.other_recipe.id}/shopping_cart/'
+        self.check_budget('post', url, CREATED, 14, 100,
+                          teardown=self.remove(ShoppingCart))
+        self.check_budget('delete', url, DELETED, 11, 100,
+                          setup=self.add(ShoppingCart))
+
+    def test_favorite_bulk(self):
+        data = {'recipes': self.bulk_recipes}
+        self.check_budget('post', '/api/recipes/favorite/', OK, 7, 100,
+                          data=data, teardown=self.bulk_remove(Favorite))
+        self.check_budget('delete', '/api/recipes/favorite/', OK, 7, 100,
+                          data=data, setup=self.bulk_add(Favorite))
+
+    def test_shopping_cart_bulk(self):
+        data = {'recipes': self.bulk_recipes}
+        self.check_budget('post', '/api/recipes/shopping_cart/', OK, 11, 150,
+                          data=data, teardown=self.bulk_remove(ShoppingCart))
+        self.check_budget('delete', '/api/recipes/shopping_cart/', OK, 11,
+                          150, data=data, setup=self.bulk_add(ShoppingCart))
+
+    def test_download_shopping_cart(self):
+        url = '/api/recipes/download_shopping_cart/'
+        self.check_budget('get', url, OK, 2, 300)
+        self.check_budget('get', url, UNAUTHORIZED, 0, 50,
+                          authenticated=False)
+
+    def test_users(self):
+        url = f'/api/users/{self.author.id}/'
+        self.check_budget('get', '/api/users/', OK, 2, 100,
+                          authenticated=False)
+        self.check_budget('get', '/api/users/', OK, 3, 100)
+        self.check_budget('get', url, OK, 1, 50, authenticated=False)
+        self.check_budget('get', url, OK, 2, 50)
+        self.check_budget('get', '/api/users/me/', OK, 1, 50)
+
+    def test_subscriptions(self):
+        self.check_budget('get', '/api/users/subscriptions/?recipes_limit=3',
+                          OK, 4, 150)
+        self.check_budget('get', '/api/users/subscriptions/', UNAUTHORIZED,
+                          0, 50, authenticated=False)
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+
+        def subscribe():
+            Subscribe.objects.create(user=self.user, author=self.author)
+
+        def unsubscribe(response):
+            Subscribe.objects.filter(
+                user=self.user, author=self.author
+            ).delete()
+
+        self.check_budget('post', url, CREATED, 11, 100,
+                          teardown=unsubscribe)
+        self.check_budget('delete', url, DELETED, 5, 100, setup=subscribe)
+
+    def test_tags(self):
+        self.check_budget('get', '/api/tags/', OK, 1, 50, authenticated=False)
+        self.check_budget('get', '/api/tags/', OK, 2, 50)
+
+    def test_ingredients(self):
+        url = '/api/ingredients/?name=ингр'
+        self.check_budget('get', url, OK, 0, 50, authenticated=False)
+        self.check_budget('get', url, OK, 1, 50)
+        self.check_budget('get', '/api/ingredients/', OK, 0, 100,
+                          authenticated=False)
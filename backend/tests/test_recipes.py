@@ -0,0 +1,322 @@
+"""Поведение рецептов: курсор, кэш, теги, списки покупок."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.filters import TagsMatch
+from recipes.models import (
+    BulkStatus,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag,
+)
+
+User = get_user_model()
+
+IMAGE_NAME = 'recipes/placeholder.png'
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        first_name='Имя', last_name='Фамилия', password='!'
+    )
+
+
+def create_recipe(author, name, tags=(), amounts=None):
+    recipe = Recipe.objects.create(
+        author=author, name=name, text='Описание', cooking_time=1,
+        image=IMAGE_NAME
+    )
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in (amounts or {}).items()
+    )
+    return recipe
+
+
+def get_ids(response):
+    return [recipe['id'] for recipe in response.data['results']]
+
+
+class RecipeListTest(APITestCase):
+    """Курсорная паджинация и фильтр по тегам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.breakfast, cls.dinner = (
+            Tag.objects.create(name=name, color='#49B64E', slug=slug)
+            for name, slug in (('Завтрак', 'breakfast'), ('Ужин', 'dinner'))
+        )
+        cls.recipes = [
+            create_recipe(cls.author, f'Рецепт {number}')
+            for number in range(7)
+        ]
+        cls.recipes[0].tags.set((cls.breakfast,))
+        cls.recipes[1].tags.set((cls.breakfast, cls.dinner))
+        cls.recipes[2].tags.set((cls.dinner,))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_walk(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+        url = '/api/recipes/?cursor=&limit=3'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(response.data['count'])
+            pages.append(get_ids(response))
+            url = response.data['next']
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+        url = response.data['previous']
+        for page in reversed(pages[:-1]):
+            response = self.client.get(url)
+            self.assertEqual(get_ids(response), page)
+            url = response.data['previous']
+        self.assertIsNone(url)
+
+    def test_bad_cursor(self):
+        for cursor in ('not-base64!', 'eyJwIjogWzFdfQ=='):
+            response = self.client.get(f'/api/recipes/?cursor={cursor}')
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, cursor
+            )
+
+    def test_tags_match(self):
+        url = '/api/recipes/?tags=breakfast&tags=dinner'
+        any_ids = {recipe.id for recipe in self.recipes[:3]}
+        self.assertEqual(set(get_ids(self.client.get(url))), any_ids)
+        self.assertEqual(
+            set(get_ids(self.client.get(
+                f'{url}&tags_match={TagsMatch.ANY}'
+            ))),
+            any_ids
+        )
+        self.assertEqual(
+            get_ids(self.client.get(f'{url}&tags_match={TagsMatch.ALL}')),
+            [self.recipes[1].id]
+        )
+
+
+class AnonymousCacheTest(APITestCase):
+    """Сброс кэша ответов анонимным пользователям."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author, 'Рецепт')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_recipe(self):
+        return self.client.get(f'/api/recipes/{self.recipe.id}/').data
+
+    def test_recipe_edit(self):
+        self.assertEqual(self.get_recipe()['name'], 'Рецепт')
+        # Изменение без сигналов не сбрасывает кэш.
+        Recipe.objects.filter(pk=self.recipe.pk).update(name='Без сброса')
+        self.assertEqual(self.get_recipe()['name'], 'Рецепт')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = 'Новое название'
+            self.recipe.save()
+        self.assertEqual(self.get_recipe()['name'], 'Новое название')
+
+    def test_author_edit(self):
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.data['results'][0]['author']['first_name'],
+                         'Имя')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Другое'
+            self.author.save()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.data['results'][0]['author']['first_name'],
+                         'Другое')
+        self.assertEqual(self.get_recipe()['author']['first_name'], 'Другое')
+
+
+class ShoppingListTest(APITestCase):
+    """Суммы ингредиентов в списках покупок и массовые изменения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('user')
+        cls.other_user = create_user('other')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#49B64E', slug='breakfast'
+        )
+        cls.recipes = [
+            create_recipe(cls.user, f'Рецепт {number}', (cls.tag,), {
+                cls.ingredients[number]: 10,
+                cls.ingredients[number + 1]: 5,
+            })
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other_user)
+
+    def assert_recomputed(self):
+        self.assertEqual(
+            {
+                (item.user_id, item.ingredient_id): item.amount
+                for item in ShoppingListItem.objects.all()
+            },
+            {
+                (user_id, ingredient_id): total
+                for user_id, ingredient_id, total
+                in ShoppingListItem.objects.calculate()
+            }
+        )
+
+    def test_add_edit_remove(self):
+        for client in (self.client, self.other_client):
+            for recipe in self.recipes[:2]:
+                response = client.post(
+                    f'/api/recipes/{recipe.id}/shopping_cart/'
+                )
+                self.assertEqual(response.status_code,
+                                 status.HTTP_201_CREATED)
+        self.assert_recomputed()
+        response = self.client.patch(
+            f'/api/recipes/{self.recipes[0].id}/',
+            {
+                'tags': [self.tag.id],
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 3},
+                    {'id': self.ingredients[3].id, 'amount': 7},
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_recomputed()
+        self.client.delete(f'/api/recipes/{self.recipes[0].id}/shopping_cart/')
+        self.assert_recomputed()
+        self.assertTrue(ShoppingListItem.objects.filter(
+            user=self.user, ingredient=self.ingredients[1]
+        ).exists())
+
+    def test_admin_edit(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[0])
+        ShoppingCart.objects.create(
+            user=self.other_user, recipe=self.recipes[0]
+        )
+        recipe = self.recipes[0]
+        rows = list(RecipeIngredient.objects.filter(
+            recipe=recipe
+        ).order_by('pk'))
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', '!'
+        )
+        client = Client()
+        client.force_login(admin)
+        prefix = 'recipe_ingredients'
+        data = {
+            'name': recipe.name, 'author': recipe.author_id,
+            'text': recipe.text, 'cooking_time': recipe.cooking_time,
+            'tags': [self.tag.id],
+            f'{prefix}-TOTAL_FORMS': 3, f'{prefix}-INITIAL_FORMS': 2,
+            f'{prefix}-MIN_NUM_FORMS': 0, f'{prefix}-MAX_NUM_FORMS': 1000,
+            f'{prefix}-2-recipe': recipe.id,
+            f'{prefix}-2-ingredient': self.ingredients[3].id,
+            f'{prefix}-2-amount': 4,
+        }
+        for number, (row, amount) in enumerate(zip(rows, (25, 5))):
+            data.update({
+                f'{prefix}-{number}-id': row.id,
+                f'{prefix}-{number}-recipe': recipe.id,
+                f'{prefix}-{number}-ingredient': row.ingredient_id,
+                f'{prefix}-{number}-amount': amount,
+            })
+        data[f'{prefix}-1-DELETE'] = 'on'
+        response = client.post(
+            f'/admin/recipes/recipe/{recipe.id}/change/', data
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(
+            dict(recipe.recipe_ingredients.values_list(
+                'ingredient_id', 'amount'
+            )),
+            {self.ingredients[0].id: 25, self.ingredients[3].id: 4}
+        )
+        self.assert_recomputed()
+
+    def test_bulk_statuses(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        missing = max(recipe.id for recipe in self.recipes) + 1
+        recipe_ids = [self.recipes[0].id, self.recipes[1].id, missing,
+                      self.recipes[1].id]
+        response = self.client.post(
+            '/api/recipes/favorite/', {'recipes': recipe_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'id': self.recipes[0].id, 'status': BulkStatus.EXISTS},
+            {'id': self.recipes[1].id, 'status': BulkStatus.ADDED},
+            {'id': missing, 'status': BulkStatus.NOT_FOUND},
+        ])
+        response = self.client.delete(
+            '/api/recipes/favorite/',
+            {'recipes': [self.recipes[1].id, self.recipes[2].id]},
+            format='json'
+        )
+        self.assertEqual(response.data, [
+            {'id': self.recipes[1].id, 'status': BulkStatus.REMOVED},
+            {'id': self.recipes[2].id, 'status': BulkStatus.ABSENT},
+        ])
+        self.assertEqual(
+            list(Favorite.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            [self.recipes[0].id]
+        )
+        self.recipes[0].refresh_from_db()
+        self.recipes[1].refresh_from_db()
+        self.assertEqual(
+            (self.recipes[0].favorites_count, self.recipes[1].favorites_count),
+            (1, 0)
+        )
+
+    def test_bulk_cart_remove(self):
+        recipe_ids = [recipe.id for recipe in self.recipes]
+        for client in (self.client, self.other_client):
+            response = client.post(
+                '/api/recipes/shopping_cart/', {'recipes': recipe_ids},
+                format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_recomputed()
+        response = self.client.delete(
+            '/api/recipes/shopping_cart/', {'recipes': recipe_ids[:2]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_recomputed()
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list(
+                'carts_count', flat=True
+            )),
+            [1, 1, 2]
+        )
@@ -0,0 +1,99 @@
+"""Чтение с реплик БД.
+
+Тесты выполняются, если настроена реплика replica_1, например:
+DB_REPLICA_HOSTS=localhost и общий бэкенд кэша (CACHE_BACKEND). В тестах
+реплика указывает на тестовую базу основной БД (TEST MIRROR), но
+использует отдельное соединение, поэтому по запросам соединений видно,
+куда направлено чтение.
+"""
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.db import replica_reads
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+REPLICA = 'replica_1'
+
+
+@unittest.skipUnless(REPLICA in settings.DATABASES, 'Реплика не настроена')
+class ReplicaRoutingTest(TransactionTestCase):
+    """Маршрутизация чтения и записи и привязка клиента после записи."""
+    # Раннер собирает базы и пропущенных тестов: без реплики - только default.
+    databases = {DEFAULT_DB_ALIAS, REPLICA} & set(settings.DATABASES)
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.other_user = (
+            User.objects.create_user(
+                username=username, email=f'{username}@example.com',
+                first_name='Имя', last_name='Фамилия', password='!'
+            )
+            for username in ('user', 'other')
+        )
+        Tag.objects.create(name='Завтрак', color='#49B64E', slug='breakfast')
+        self.recipe = Recipe.objects.create(
+            author=self.other_user, name='Рецепт', text='Описание',
+            cooking_time=1, image='recipes/placeholder.png'
+        )
+
+    def get_client(self, user):
+        client = APIClient()
+        token = Token.objects.create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def request(self, client, method, url):
+        """Таблицы, к которым обращались основная БД и реплика."""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = getattr(client, method)(url)
+        return response, (
+            ' '.join(query['sql'] for query in primary.captured_queries),
+            ' '.join(query['sql'] for query in replica.captured_queries),
+        )
+
+    def test_get_reads_from_replica(self):
+        response, (primary, replica) = self.request(
+            self.get_client(self.user), 'get', '/api/tags/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertIn('recipes_tag', replica)
+        self.assertNotIn('recipes_tag', primary)
+
+    def test_write_goes_to_primary_and_pins_client(self):
+        client = self.get_client(self.user)
+        response, (primary, replica) = self.request(
+            client, 'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('INSERT INTO "recipes_favorite"', primary)
+        self.assertEqual(replica, '')
+        # Следующее чтение клиента - с основной БД, других - с реплики.
+        response, (primary, replica) = self.request(
+            client, 'get', '/api/tags/'
+        )
+        self.assertIn('recipes_tag', primary)
+        self.assertNotIn('recipes_tag', replica)
+        response, (primary, replica) = self.request(
+            self.get_client(self.other_user), 'get', '/api/tags/'
+        )
+        self.assertIn('recipes_tag', replica)
+
+    def test_replica_reads_block(self):
+        for use_replica, alias in ((True, REPLICA),
+                                   (False, DEFAULT_DB_ALIAS)):
+            with replica_reads(use_replica):
+                self.assertEqual(Tag.objects.all().db, alias)
+        self.assertEqual(Tag.objects.all().db, DEFAULT_DB_ALIAS)
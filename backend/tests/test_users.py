@@ -0,0 +1,61 @@
+"""Поведение пользователей: кэш токенов."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from users.authentication import get_token_cache_key
+
+User = get_user_model()
+
+
+class TokenCacheTest(APITestCase):
+    """Сброс кэша токена при выходе и деактивации пользователя."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com',
+            first_name='Имя', last_name='Фамилия', password='!'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_me(self):
+        response = self.client.get('/api/users/me/')
+        if response.status_code == status.HTTP_200_OK:
+            self.assertIsNotNone(
+                cache.get(get_token_cache_key(self.token.key))
+            )
+        return response.status_code
+
+    def test_logout(self):
+        self.assertEqual(self.get_me(), status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(cache.get(get_token_cache_key(self.token.key)))
+        self.assertEqual(self.get_me(), status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation(self):
+        self.assertEqual(self.get_me(), status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get_me(), status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_has_no_password(self):
+        self.assertEqual(self.get_me(), status.HTTP_200_OK)
+        cached = cache.get(get_token_cache_key(self.token.key))
+        self.assertIsInstance(cached, User)
+        self.assertIn('password', cached.get_deferred_fields())
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': '!', 'new_password': 'NewPassword1!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('NewPassword1!'))
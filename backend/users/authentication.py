@@ -0,0 +1,68 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.db import replica_reads
+from foodgram.metrics import observe_cache
+
+TOKEN_CACHE_KEY = 'users:token:{}'
+
+# Счетчики и флаг ленты изменяются запросами UPDATE без загрузки
+# пользователя; они не загружаются, чтобы сохранение пользователя из кэша
+# не перезаписало их. Хеш пароля не загружается, чтобы не попасть в кэш
+# (при проверке пароля он читается из базы данных).
+DEFERRED_USER_FIELDS = (
+    'user__recipes_count', 'user__subscribers_count', 'user__feed_pull',
+    'user__password'
+)
+
+
+def get_token_cache_key(key):
+    return TOKEN_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_token(key):
+    cache.delete(get_token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя.
+
+    В кэше хранится только пользователь без хеша пароля и счетчиков;
+    сам токен в кэш не записывается (ключ кэша - хеш токена).
+
+    Запись кэша удаляется при удалении токена (выход) и при сохранении
+    пользователя (смена пароля, деактивация, изменение данных), но
+    изменения в обход сигналов (QuerySet.update) учитываются только
+    по истечении TOKEN_CACHE_TIMEOUT. При нескольких воркерах нужен
+    общий бэкенд кэша.
+    """
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        cache_key = get_token_cache_key(key)
+        user = cache.get(cache_key)
+        observe_cache('token', user is not None)
+        if user is None:
+            # Токен, только что созданный при входе, может еще
+            # отсутствовать на реплике.
+            try:
+                with replica_reads(False):
+                    user = model.objects.select_related('user').defer(
+                        *DEFERRED_USER_FIELDS
+                    ).get(key=key).user
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(cache_key, user, settings.TOKEN_CACHE_TIMEOUT)
+        # Присваивание объекта пользователя вызвало бы db_for_write
+        # и отключило бы чтение с реплики до конца запроса.
+        token = model(key=key, user_id=user.pk)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return (user, token)
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 20:58
+
+from django.db import migrations, models
+
+# Значение FEED_FANOUT_LIMIT по умолчанию на момент миграции; флаги
+# с другим значением пересчитывает команда rebuild_feeds.
+FANOUT_LIMIT = 1000
+
+
+def set_feed_pull(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    pull_authors = (
+        Subscribe.objects
+        .values('author')
+        .annotate(count=models.Count('pk'))
+        .filter(count__gt=FANOUT_LIMIT)
+        .values('author')
+    )
+    User.objects.filter(pk__in=pull_authors).update(feed_pull=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_auto_20261018_1953'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_pull',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Рецепты читаются при запросе ленты'),
+        ),
+        migrations.RunPython(set_feed_pull, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,13 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from foodgram.counters import CountersModelMixin
 
-class User(AbstractUser):
+
+class User(CountersModelMixin, AbstractUser):
     """Модель пользователей."""
+    counter_fields = ('recipes_count', 'subscribers_count', 'feed_pull')
+
     first_name = models.CharField(
         verbose_name=_('first name'),
         max_length=150,
@@ -21,6 +25,21 @@ class User(AbstractUser):
         help_text='Обязательное поле.',
         db_index=True
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False
+    )
+    feed_pull = models.BooleanField(
+        verbose_name='Рецепты читаются при запросе ленты',
+        default=False,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -1,10 +1,10 @@
-import logging
-
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from foodgram.annotations import missing_annotation
+from recipes.fields import RenditionImageField
 from recipes.models import Recipe
 from users.models import Subscribe
 
@@ -32,11 +32,7 @@ class CustomUserSerializer(UserSerializer):
         if not request.user.is_authenticated or request.user == obj:
             return False
         if not hasattr(obj, 'is_subscribed'):
-            logging.warning(
-                f'{request.path}: Запрос к базе данных не оптимален. '
-                f'В {self.__class__.__name__} в переданном queryset '
-                'не аннотировано поле is_subscribed'
-            )
+            missing_annotation(self, 'is_subscribed')
             return obj.subscribers.filter(user=request.user).exists()
         return obj.is_subscribed
 
@@ -53,7 +49,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
 class BrieflyRecipeSerializer(serializers.ModelSerializer):
     """Краткое отображение рецепта."""
-    image = Base64ImageField()
+    image = RenditionImageField(rendition='thumbnail')
 
     class Meta:
         model = Recipe
@@ -81,24 +77,21 @@ class SubscribeSerializer(serializers.ModelSerializer):
             'is_subscribed', 'recipes', 'recipes_count'
         )
 
-    def logger_warning(self, field):
-        """Предупреждение об отсутствии ожидаемого аннотированного поля."""
-        request = self.context['request']
-        return (
-            f'{request.path}: Запрос к базе данных не оптимален. '
-            f'В {self.__class__.__name__} в переданном queryset '
-            f'не аннотировано поле {field}'
-        )
-
-    def get_recipes(self, obj):
-        request = self.context['request']
+    @staticmethod
+    def get_recipes_limit(request):
+        """Количество рецептов автора в ответе (параметр recipes_limit)."""
         try:
             recipes_limit = int(request.query_params.get('recipes_limit'))
         except Exception:
-            recipes_limit = None
-        queryset = obj.author.recipes.all()
-        if recipes_limit is not None and recipes_limit > 0:
-            queryset = queryset[:recipes_limit]
+            return None
+        return recipes_limit if recipes_limit > 0 else None
+
+    def get_recipes(self, obj):
+        if hasattr(obj.author, 'limited_recipes'):
+            queryset = obj.author.limited_recipes
+        else:
+            recipes_limit = self.get_recipes_limit(self.context['request'])
+            queryset = obj.author.recipes.all()[:recipes_limit]
         return BrieflyRecipeSerializer(
             queryset, many=True, context=self.context
         ).data
@@ -107,14 +100,14 @@ class SubscribeSerializer(serializers.ModelSerializer):
         request = self.context['request']
         field = 'is_subscribed'
         if not hasattr(obj, field):
-            logging.warning(self.logger_warning(field))
+            missing_annotation(self, field)
             return obj.user == request.user
         return obj.is_subscribed
 
     def get_recipes_count(self, obj):
         field = 'recipes_count'
         if not hasattr(obj, field):
-            logging.warning(self.logger_warning(field))
+            missing_annotation(self, field)
             return obj.author.recipes.count()
         return obj.recipes_count
 
@@ -131,7 +124,9 @@ class SubscribeSerializer(serializers.ModelSerializer):
             )
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         obj = super().create(validated_data)
         obj.is_subscribed = True
+        obj.recipes_count = obj.author.recipes_count
         return obj
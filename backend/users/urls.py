@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from foodgram.async_views import async_read_urls
 from users.views import CustomUserViewSet
 
 app_name = 'users'
@@ -8,7 +9,9 @@ app_name = 'users'
 router = routers.DefaultRouter()
 router.register(r'users', CustomUserViewSet, 'users')
 
+ASYNC_READ_ROUTES = ('users-list', 'users-detail')
+
 urlpatterns = [
-    path('api/', include(router.urls)),
+    path('api/', include(async_read_urls(router.urls, ASYNC_READ_ROUTES))),
     path('api/auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,5 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Exists, OuterRef, Value
+from django.db.models import (
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Value,
+    prefetch_related_objects,
+)
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -8,6 +15,7 @@ from rest_framework.exceptions import MethodNotAllowed, NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from recipes.models import Recipe
 from users.models import Subscribe
 from users.serializers import SubscribeSerializer
 
@@ -54,13 +62,23 @@ class CustomUserViewSet(UserViewSet):
             .filter(user=self.request.user)
             .annotate(
                 is_subscribed=Value(True),
-                recipes_count=Count('author__recipes')
+                recipes_count=F('author__recipes_count')
             )
             .select_related('author')
-            .prefetch_related('author__recipes')
             .order_by('-pk')
         )
 
+    def prefetch_limited_recipes(self, subscriptions):
+        """Одним запросом загружает не более recipes_limit рецептов автора."""
+        prefetch_related_objects(subscriptions, Prefetch(
+            'author__recipes',
+            queryset=Recipe.objects.latest_per_author(
+                [subscription.author_id for subscription in subscriptions],
+                SubscribeSerializer.get_recipes_limit(self.request)
+            ).defer('search_vector'),
+            to_attr='limited_recipes'
+        ))
+
     @action(
         ('get',), detail=False,
         serializer_class=SubscribeSerializer,
@@ -68,8 +86,14 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request, *args, **kwargs):
         """Просмотр подписок пользователя."""
-        self.get_queryset = self.get_subscriptions
-        return self.list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_subscriptions())
+        page = self.paginate_queryset(queryset)
+        subscriptions = list(queryset) if page is None else page
+        self.prefetch_limited_recipes(subscriptions)
+        serializer = self.get_serializer(subscriptions, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         ('post',), detail=True,